@@ -0,0 +1,68 @@
+"""
+Benchmark: proof size and encode/decode time of the Base64 `SolverProof` JSON encoding
+versus the binary encoding, raw and zlib-compressed.
+
+uv run python -m benchmarks.bench_proof_encoding
+"""
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from warden_spex.models import SolverProof
+from warden_spex.spex import Blossom
+
+
+def timeit(fn: Callable, repeat: int = 20) -> float:
+    """
+    Return the best time in seconds of `repeat` calls to `fn`.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench(expected_items: int, fill: float) -> list[tuple]:
+    """
+    Measure all encodings for a filter sized for `expected_items`, filled to `fill` of its capacity.
+    """
+    blossom = Blossom(expected_items=expected_items)
+    blossom.add_items(np.arange(int(expected_items * fill), dtype=np.int64))
+
+    proof_json = SolverProof(bloomFilter=blossom.dump(), countItems=blossom.inserted_items).model_dump_json()
+    raw = blossom.dump_binary()
+    compressed = blossom.dump_binary(compress=True)
+
+    def encode_json():
+        return SolverProof(bloomFilter=blossom.dump(), countItems=blossom.inserted_items).model_dump_json()
+
+    # Decoding includes a popcount of the filter, so that lazily loaded filters are actually read.
+    def decode_json():
+        return Blossom.load(SolverProof.model_validate_json(proof_json)).bit_density()
+
+    return [
+        ("json+base64", len(proof_json), timeit(encode_json), timeit(decode_json)),
+        ("binary", len(raw), timeit(blossom.dump_binary), timeit(lambda: Blossom.load_binary(raw).bit_density())),
+        (
+            "binary+zlib",
+            len(compressed),
+            timeit(lambda: blossom.dump_binary(compress=True)),
+            timeit(lambda: Blossom.load_binary(compressed).bit_density()),
+        ),
+    ]
+
+
+def main():
+    print(f"{'items':>9} {'fill':>5} {'encoding':<12} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for expected_items in [1_000, 100_000, 1_000_000]:
+        for fill in [0.01, 1.0]:
+            for name, size, encode, decode in bench(expected_items, fill):
+                print(f"{expected_items:>9} {fill:>5} {name:<12} {size:>10} {encode * 1e3:>10.3f} {decode * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
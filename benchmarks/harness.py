@@ -0,0 +1,68 @@
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Result of a benchmark case: best time per call, throughput and peak traced memory.
+    """
+
+    name: str
+    items: int
+    seconds: float
+    items_per_second: float
+    peak_bytes: int
+
+
+def measure(name: str, fn: Callable, items: int = 1, repeat: int = 5) -> BenchmarkResult:
+    """
+    Measure `fn`, processing `items` items per call: best time of `repeat` calls, and peak memory
+    allocated during one additional call (traced separately, as tracing slows down execution).
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(name=name, items=items, seconds=best, items_per_second=items / best if best > 0 else 0, peak_bytes=peak_bytes)
+
+
+def to_json(results: list[BenchmarkResult]) -> dict:
+    """
+    Return JSON-serializable `results`, keyed by benchmark name.
+    """
+    return {"results": {r.name: asdict(r) for r in results}}
+
+
+def compare(current: dict, baseline: dict, time_threshold: float = 0.2, memory_threshold: float = 0.2) -> list[str]:
+    """
+    Compare `current` results against `baseline` (both as returned by `to_json`), returning a
+    description of each case slower or using more memory than the baseline by more than the
+    given relative thresholds. Cases missing from either side are ignored.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        time_ratio = result["seconds"] / reference["seconds"] if reference["seconds"] > 0 else 1
+        if time_ratio > 1 + time_threshold:
+            regressions.append(f"{name}: time {reference['seconds']:.6f}s -> {result['seconds']:.6f}s ({time_ratio:.2f}x)")
+        memory_ratio = result["peak_bytes"] / reference["peak_bytes"] if reference["peak_bytes"] > 0 else 1
+        if memory_ratio > 1 + memory_threshold:
+            regressions.append(f"{name}: memory {reference['peak_bytes']} -> {result['peak_bytes']} bytes ({memory_ratio:.2f}x)")
+    return regressions
@@ -0,0 +1,80 @@
+"""
+Offline benchmark suite for hashing, Blossom and the end-to-end PrimeSum task.
+
+uv run python -m benchmarks.run --output bench.json
+uv run python -m benchmarks.run --output bench.json --baseline baseline.json --time-threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+from datetime import UTC, datetime
+
+import numpy as np
+
+from benchmarks.harness import compare, to_json
+from benchmarks.suite import bench_blossom, bench_hashing, bench_prime_sum
+from warden_spex.pkg import package_version
+
+SIZES = {
+    "hashing": [1_000, 100_000, 1_000_000],
+    "blossom": [1_000, 100_000, 1_000_000],
+    "prime_sum": [100, 1_000, 5_000],
+}
+QUICK_SIZES = {
+    "hashing": [1_000, 10_000],
+    "blossom": [1_000, 10_000],
+    "prime_sum": [100],
+}
+SUITES = {"hashing": bench_hashing, "blossom": bench_blossom, "prime_sum": bench_prime_sum}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare results against this JSON file")
+    parser.add_argument("--time-threshold", type=float, default=0.2, help="Maximum relative slowdown (default: 0.2)")
+    parser.add_argument("--memory-threshold", type=float, default=0.2, help="Maximum relative memory increase (default: 0.2)")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated suites to run (default: {','.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="Run with small input sizes")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    results = []
+    for suite in args.suites.split(","):
+        # Silence the output of the benchmarked code (e.g., PrimeSum prints its primes).
+        with contextlib.redirect_stdout(io.StringIO()):
+            suite_results = SUITES[suite](sizes[suite])
+        for r in suite_results:
+            print(f"{r.name:<60} {r.seconds * 1e3:>12.3f} ms {r.items_per_second:>14.0f} items/s {r.peak_bytes / 2**20:>10.2f} MiB")
+        results.extend(suite_results)
+
+    report = to_json(results)
+    report["metadata"] = {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "package_version": package_version,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "quick": args.quick,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, time_threshold=args.time_threshold, memory_threshold=args.memory_threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
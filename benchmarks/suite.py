@@ -0,0 +1,159 @@
+import sys
+
+import numpy as np
+
+from benchmarks.harness import BenchmarkResult, measure
+from warden_spex.hashing.hash_array import check_validity, check_validity_csr, hash_array, hash_array_csr, hash_array_grid
+from warden_spex.hashing.hash_embedding import (
+    hash_embedding_m,
+    hash_embedding_m_batch,
+    hash_embedding_simhash_batch,
+    jaccard_index_bands,
+    jaccard_index_many,
+    simhash_bands,
+    sketch_embedding_m,
+)
+from warden_spex.hashing.hash_int import INT_HASH_FUNCTIONS, hash_int, hash_int_batch, hash_tensor
+from warden_spex.models import SolverProof
+from warden_spex.pkg import project_dir
+from warden_spex.spex import Blossom
+
+# Largest input size for benchmarks of per-item Python loops, to keep runs short.
+MAX_LOOP_ITEMS = 100_000
+
+
+def bench_hashing(sizes: list[int]) -> list[BenchmarkResult]:
+    """
+    Hashing functions, with `sizes` input values, arrays elements or embeddings.
+    """
+    rng = np.random.default_rng(0)
+    results = []
+    for n in sizes:
+        values = rng.integers(-(2**40), 2**40, size=n)
+        a1 = rng.normal(size=n)
+        a2 = a1 + rng.uniform(-0.0001, 0.0001, size=n)
+        n_embeddings = max(n // 100, 1)
+        A = rng.normal(size=(n_embeddings, 384))
+        V = rng.normal(size=(16, 384))
+
+        if n <= MAX_LOOP_ITEMS:
+            results.append(measure(f"hash_int[n={n}]", lambda values=values: [hash_int(v) for v in values], items=n))
+            results.append(
+                measure(
+                    f"hash_array+check_validity[n={n}]",
+                    lambda a1=a1, a2=a2: check_validity(hash_array(a1), hash_array(a2)),
+                    items=n,
+                )
+            )
+            results.append(
+                measure(f"hash_embedding_m[n={n_embeddings}]", lambda A=A, V=V: [hash_embedding_m(x, V) for x in A], items=n_embeddings)
+            )
+        results.append(measure(f"hash_int_batch[n={n}]", lambda values=values: hash_int_batch(values), items=n))
+        # Alternatives to SHA-256, the default measured above.
+        for name, f in INT_HASH_FUNCTIONS.items():
+            if name in ("sha256", "tensor"):
+                continue
+            if n <= MAX_LOOP_ITEMS:
+                results.append(measure(f"hash_int[{name},n={n}]", lambda values=values, f=f: [f.hash_int(v) for v in values], items=n))
+            results.append(measure(f"hash_int_digests[{name},n={n}]", lambda values=values, f=f: f.digests(values), items=n))
+        # A single tensor state of n float64 values (8n bytes).
+        results.append(measure(f"hash_tensor[n={n}]", lambda a1=a1: hash_tensor(a1), items=n))
+        results.append(
+            measure(
+                f"hash_array_csr+check_validity_csr[n={n}]",
+                lambda a1=a1, a2=a2: check_validity_csr(hash_array_csr(a1), hash_array_csr(a2)),
+                items=n,
+            )
+        )
+        results.append(
+            measure(
+                f"hash_array_grid+check_validity_csr[n={n}]",
+                lambda a1=a1, a2=a2: check_validity_csr(hash_array_grid(a1), hash_array_grid(a2)),
+                items=n,
+            )
+        )
+        results.append(
+            measure(f"hash_embedding_m_batch[n={n_embeddings}]", lambda A=A, V=V: hash_embedding_m_batch(A, V), items=n_embeddings)
+        )
+        results.append(
+            measure(
+                f"sketch_embedding_m+jaccard_index_many[n={n_embeddings}]",
+                lambda A=A, V=V: jaccard_index_many(sketch := sketch_embedding_m(A, V), sketch),
+                items=n_embeddings**2,
+            )
+        )
+        results.append(
+            measure(f"hash_embedding_simhash_batch[n={n_embeddings}]", lambda A=A: hash_embedding_simhash_batch(A), items=n_embeddings)
+        )
+        results.append(
+            measure(
+                f"simhash_bands+jaccard_index_bands[n={n_embeddings}]",
+                lambda A=A: jaccard_index_bands(bands := simhash_bands(A), bands),
+                items=n_embeddings**2,
+            )
+        )
+    return results
+
+
+def bench_blossom(sizes: list[int]) -> list[BenchmarkResult]:
+    """
+    Blossom operations, with filters sized for `sizes` items and filled to capacity.
+    """
+    results = []
+    for n in sizes:
+        states = np.arange(n, dtype=np.int64)
+        probes = states + n
+        blossom = Blossom(expected_items=n)
+        blossom.add_items(states)
+        proof = SolverProof(bloomFilter=blossom.dump(), countItems=blossom.inserted_items)
+
+        def add_serial(states=states, n=n):
+            b = Blossom(expected_items=n)
+            for state in states:
+                b.add(state)
+
+        if n <= MAX_LOOP_ITEMS:
+            results.append(measure(f"blossom.add[n={n}]", add_serial, items=n))
+            results.append(measure(f"blossom.is_hit[n={n}]", lambda b=blossom, p=probes: [b.is_hit(x) for x in p], items=n))
+        results.append(
+            measure(f"blossom.add_items[n={n}]", lambda states=states, n=n: Blossom(expected_items=n).add_items(states), items=n)
+        )
+        for name in [name for name in INT_HASH_FUNCTIONS if name not in ("sha256", "tensor")]:
+            results.append(
+                measure(
+                    f"blossom.add_items[{name},n={n}]",
+                    lambda states=states, n=n, name=name: Blossom(expected_items=n, hash_function=name).add_items(states),
+                    items=n,
+                )
+            )
+        results.append(measure(f"blossom.is_hit_batch[n={n}]", lambda b=blossom, p=probes: b.is_hit_batch(p), items=n))
+        results.append(measure(f"blossom.dump[n={n}]", blossom.dump))
+        results.append(measure(f"blossom.load[n={n}]", lambda proof=proof: Blossom.load(proof).estimate_false_positive_rate()))
+        results.append(measure(f"blossom.estimate_false_positive_rate[n={n}]", blossom.estimate_false_positive_rate))
+        results.append(
+            measure(
+                f"blossom.estimate_false_positive_rate[montecarlo,n={n}]",
+                lambda b=blossom: b.estimate_false_positive_rate(method="montecarlo", seed=0),
+                items=100000,
+            )
+        )
+    return results
+
+
+def bench_prime_sum(sizes: list[int]) -> list[BenchmarkResult]:
+    """
+    End-to-end PrimeSum task (solve and verify), with `sizes` primes.
+    """
+    # The PrimeSum task is the reference example, defined with the tests.
+    sys.path.insert(0, str(project_dir / "tests"))
+    from test_spex import PrimeSumTask, prime_sum_verifier_request  # pylint: disable=import-outside-toplevel,import-error
+
+    results = []
+    for n in sizes:
+
+        def solve_verify(n=n):
+            verifier_request = prime_sum_verifier_request(n, verificationRatio=0.1)
+            assert PrimeSumTask.verify(verifier_request).isVerified
+
+        results.append(measure(f"prime_sum.solve+verify[n={n}]", solve_verify, items=n, repeat=3))
+    return results
@@ -0,0 +1,299 @@
+import base64
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from hashlib import blake2b
+from pathlib import Path
+
+import numpy as np
+from numpy.typing import NDArray
+
+from warden_spex.hashing.hash_int import INT_HASH_FUNCTIONS, HashFunctionName
+from warden_spex.models import SolverProof
+from warden_spex.spex import SCALABLE_MAGIC, Blossom, InvalidValueException, ScalableBlossom
+
+# Proof archive: an append-only data file with the filter bytes of each proof (rbloom or scalable
+# serialization, without Base64), and an append-only index file with, for each proof, its task,
+# request id, location in the data file, number of items, hash function code and kind.
+# Both files start with magic and version.
+ARCHIVE_MAGIC = b"SPXA"
+ARCHIVE_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sB")
+_INDEX_ENTRY = struct.Struct("<QQQBBHH")
+_KIND_BLOOM = 0
+_KIND_SCALABLE = 1
+
+DATA_FILE = "proofs.dat"
+INDEX_FILE = "proofs.idx"
+
+# Appended entries are looked up in a dict, merged into the sorted arrays of the in-memory index
+# once they exceed this many, or 1/64 of the archived proofs if more.
+_PENDING_ENTRIES = 4096
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """
+    Location and metadata of a proof in the archive.
+    """
+
+    offset: int
+    length: int
+    count_items: int
+    hash_code: int
+    kind: int
+
+
+class ProofArchive:  # pylint: disable=too-many-instance-attributes
+    """
+    On-disk, append-only archive of solver proofs, indexed by task and request id.
+    The data file is memory-mapped: loaded filters are queried in place, without copying
+    them into memory, so that archives can be much larger than the available memory.
+    The index file is memory-mapped as well: in memory, each proof takes 16 bytes
+    (hash of its key and offset of its index entry), and entries are decoded on lookup.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Open the archive in directory `path`, creating it if missing. Index entries of proofs
+        whose data was not completely written (e.g., after a crash) are discarded.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._map: mmap.mmap | None = None
+        self._index_map: mmap.mmap | None = None
+        # Key hashes (see `_key_hash`) in sorted order, and the offsets of their entries in the
+        # index file. Entries appended since the last merge are in `_pending`, by key hash.
+        self._hashes: NDArray[np.uint64] = np.empty(0, dtype=np.uint64)
+        self._offsets: NDArray[np.uint64] = np.empty(0, dtype=np.uint64)
+        self._pending: dict[int, list[int]] = {}
+
+        data_size = self._open_file(DATA_FILE)
+        index_size = self._open_file(INDEX_FILE)
+        self._data = open(self.path / DATA_FILE, "r+b")  # noqa: SIM115 # pylint: disable=consider-using-with
+        self._index_file = open(self.path / INDEX_FILE, "r+b")  # noqa: SIM115 # pylint: disable=consider-using-with
+
+        valid_size = self._read_index(data_size, index_size)
+        self._index_file.truncate(valid_size)
+        self._index_file.seek(valid_size)
+        self._data.seek(0, os.SEEK_END)
+
+    def _open_file(self, name: str) -> int:
+        # Create the file with its header if missing, check the header, and return the file size.
+        file_path = self.path / name
+        if not file_path.exists() or file_path.stat().st_size == 0:
+            file_path.write_bytes(_FILE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION))
+        with open(file_path, "rb") as f:
+            header = f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header) != (ARCHIVE_MAGIC, ARCHIVE_VERSION):
+            raise InvalidValueException(f"Unsupported proof archive file: {file_path}")
+        return file_path.stat().st_size
+
+    def _read_index(self, data_size: int, index_size: int) -> int:
+        # Build the in-memory index from the key of each entry, returning the size of its valid prefix.
+        hashes, offsets = array("Q"), array("Q")
+        valid_size = _FILE_HEADER.size
+        with mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            for offset, end in _scan_index(index, data_size, index_size):
+                hashes.append(_key_hash(_entry_key(index, offset)))
+                offsets.append(offset)
+                valid_size = end
+        order = np.argsort(np.frombuffer(hashes, dtype=np.uint64), kind="stable")
+        self._hashes = np.frombuffer(hashes, dtype=np.uint64)[order]
+        self._offsets = np.frombuffer(offsets, dtype=np.uint64)[order]
+        return valid_size
+
+    def _index_view(self) -> mmap.mmap:
+        # Memory-mapped index file, remapping it if it grew.
+        if self._index_map is None or self._index_file.tell() > len(self._index_map):
+            self._index_file.flush()
+            self._index_map = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._index_map
+
+    def _find(self, key: bytes) -> int | None:
+        # Offset in the index file of the entry with `key` (see `_key`), or None if missing.
+        # Entries with the same key hash are told apart by their key, read from the index file.
+        key_hash = _key_hash(key)
+        start = int(np.searchsorted(self._hashes, np.uint64(key_hash), side="left"))
+        stop = int(np.searchsorted(self._hashes, np.uint64(key_hash), side="right"))
+        candidates = [*self._pending.get(key_hash, []), *self._offsets[start:stop].tolist()]
+        if not candidates:
+            return None
+        index = self._index_view()
+        return next((offset for offset in candidates if _entry_key(index, offset) == key), None)
+
+    def _merge_pending(self):
+        # Merge the pending entries into the sorted arrays.
+        pending = sorted((key_hash, offset) for key_hash, offsets in self._pending.items() for offset in offsets)
+        hashes = np.array([key_hash for key_hash, _ in pending], dtype=np.uint64)
+        positions = np.searchsorted(self._hashes, hashes, side="right")
+        self._hashes = np.insert(self._hashes, positions, hashes)
+        self._offsets = np.insert(self._offsets, positions, np.array([offset for _, offset in pending], dtype=np.uint64))
+        self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._hashes) + sum(len(offsets) for offsets in self._pending.values())
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return self._find(_key(*key)) is not None
+
+    def close(self):
+        """
+        Flush and close the archive files. Filters loaded from the archive remain valid.
+        """
+        self.flush()
+        self._data.close()
+        self._index_file.close()
+        self._map = None
+        self._index_map = None
+
+    def flush(self):
+        """
+        Write buffered proofs and index entries to disk.
+        """
+        self._data.flush()
+        self._index_file.flush()
+
+    def append(self, task: str, request_id: str, proof: SolverProof):
+        """
+        Append `proof` for `task` and `request_id`, which must not be in the archive already.
+        """
+        key = _key(task, request_id)
+        if self._find(key) is not None:
+            raise InvalidValueException(f"Proof already archived: task={task} request_id={request_id}")
+
+        data = base64.b64decode(proof.bloomFilter)
+        kind = _KIND_SCALABLE if data[: len(SCALABLE_MAGIC)] == SCALABLE_MAGIC else _KIND_BLOOM
+        data_offset = self._data.tell()
+        self._data.write(data)
+
+        offset = self._index_file.tell()
+        task_bytes, request_id_bytes = task.encode(), request_id.encode()
+        hash_code = INT_HASH_FUNCTIONS[proof.hashFunction].code
+        self._index_file.write(
+            _INDEX_ENTRY.pack(data_offset, len(data), proof.countItems, hash_code, kind, len(task_bytes), len(request_id_bytes))
+        )
+        self._index_file.write(task_bytes + request_id_bytes)
+        self._pending.setdefault(_key_hash(key), []).append(offset)
+        if len(self._pending) > max(_PENDING_ENTRIES, len(self._hashes) >> 6):
+            self._merge_pending()
+
+    def _view(self, entry: ArchiveEntry) -> memoryview:
+        # Memory-mapped bytes of `entry`, remapping the data file if it grew.
+        if self._map is None or entry.offset + entry.length > len(self._map):
+            self._data.flush()
+            # The previous map stays alive as long as filters loaded from it are in use.
+            self._map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[entry.offset : entry.offset + entry.length]
+
+    @staticmethod
+    def _hash_function(entry: ArchiveEntry) -> HashFunctionName:
+        hash_function = next((f.name for f in INT_HASH_FUNCTIONS.values() if f.code == entry.hash_code), None)
+        if hash_function is None:
+            raise InvalidValueException(f"Unsupported hash function code: {entry.hash_code}")
+        return hash_function
+
+    def _load_entry(self, entry: ArchiveEntry) -> Blossom | ScalableBlossom:
+        hash_function = self._hash_function(entry)
+        data = self._view(entry)
+        if entry.kind == _KIND_SCALABLE:
+            return ScalableBlossom.from_serialized(data, hash_function)
+        return Blossom.from_serialized(data, entry.count_items, hash_function)
+
+    def _entry(self, task: str, request_id: str) -> ArchiveEntry:
+        offset = self._find(_key(task, request_id))
+        if offset is None:
+            raise KeyError((task, request_id))
+        return _read_entry(self._index_view(), offset)[2]
+
+    def _entries(self) -> Iterator[tuple[str, str, ArchiveEntry]]:
+        # Iterate over the entries of the index file, in append order, sequentially and in constant memory.
+        self.flush()
+        data_size = os.fstat(self._data.fileno()).st_size
+        index = self._index_view()
+        for offset, _ in _scan_index(index, data_size, len(index)):
+            yield _read_entry(index, offset)
+
+    def load(self, task: str, request_id: str) -> Blossom | ScalableBlossom:
+        """
+        Load the Bloom filter of the proof for `task` and `request_id`, queried in place on the
+        memory-mapped data file.
+        """
+        return self._load_entry(self._entry(task, request_id))
+
+    def proof(self, task: str, request_id: str) -> SolverProof:
+        """
+        Return the proof for `task` and `request_id`, as archived.
+        """
+        entry = self._entry(task, request_id)
+        return SolverProof(
+            bloomFilter=base64.b64encode(self._view(entry)),
+            countItems=entry.count_items,
+            hashFunction=self._hash_function(entry),
+        )
+
+    def keys(self, task: str | None = None) -> Iterator[tuple[str, str]]:
+        """
+        Iterate over the task and request id of the archived proofs (of `task` only, if provided), in append order.
+        """
+        for t, request_id, _ in self._entries():
+            if task is None or t == task:
+                yield t, request_id
+
+    def items(self, task: str | None = None) -> Iterator[tuple[str, str, Blossom | ScalableBlossom]]:
+        """
+        Iterate over the archived proofs (of `task` only, if provided), as task, request id and
+        Bloom filter. Proofs are read in append order, sequentially from the index and data files,
+        in constant memory.
+        """
+        for t, request_id, entry in self._entries():
+            if task is None or t == task:
+                yield t, request_id, self._load_entry(entry)
+
+
+def _scan_index(index: mmap.mmap, data_size: int, index_size: int) -> Iterator[tuple[int, int]]:
+    # Iterate over the entries of the memory-mapped `index` file, in append order, as their start and end
+    # offsets. It stops at the first entry not completely written.
+    offset = _FILE_HEADER.size
+    while offset + _INDEX_ENTRY.size <= index_size:
+        entry_offset, length, _, _, _, task_size, request_id_size = _INDEX_ENTRY.unpack_from(index, offset)
+        end = offset + _INDEX_ENTRY.size + task_size + request_id_size
+        if end > index_size or entry_offset + length > data_size:
+            return
+        yield offset, end
+        offset = end
+
+
+def _read_entry(index: mmap.mmap, offset: int) -> tuple[str, str, ArchiveEntry]:
+    # Task, request id and entry at `offset` of the memory-mapped `index` file.
+    entry_offset, length, count_items, hash_code, kind, task_size, request_id_size = _INDEX_ENTRY.unpack_from(index, offset)
+    start = offset + _INDEX_ENTRY.size
+    task = index[start : start + task_size].decode()
+    request_id = index[start + task_size : start + task_size + request_id_size].decode()
+    return task, request_id, ArchiveEntry(entry_offset, length, count_items, hash_code, kind)
+
+
+def _entry_key(index: mmap.mmap, offset: int) -> bytes:
+    # Key (see `_key`) of the entry at `offset` of the memory-mapped `index` file, without decoding it.
+    *_, task_size, request_id_size = _INDEX_ENTRY.unpack_from(index, offset)
+    start = offset + _INDEX_ENTRY.size
+    return task_size.to_bytes(2, byteorder="little") + index[start : start + task_size + request_id_size]
+
+
+def _key(task: str, request_id: str) -> bytes:
+    # Unambiguous encoding of task and request id: size of the task, task and request id.
+    task_bytes = task.encode()
+    return len(task_bytes).to_bytes(2, byteorder="little") + task_bytes + request_id.encode()
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), byteorder="little")
@@ -0,0 +1,110 @@
+import numpy as np
+from numpy.typing import NDArray
+
+# Multiplier of the 128-bit linear congruential generator used by rbloom
+# to derive the k bit indexes of an item from its hash.
+# https://github.com/KenanHanke/rbloom/blob/main/src/lib.rs
+LCG_MULTIPLIER = 47026247687942121848144207491837418733
+
+# Size of the header of `Bloom.save_bytes()`, holding k as a little-endian u64.
+HEADER_SIZE = 8
+
+_MASK128 = (1 << 128) - 1
+_MASK64 = (1 << 64) - 1
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHIFT32 = np.uint64(32)
+_MULTIPLIER_LIMBS = [np.uint64((LCG_MULTIPLIER >> (32 * i)) & 0xFFFFFFFF) for i in range(4)]
+
+# Batches up to this many hashes use the scalar index generation, cheaper than the vectorized one.
+SCALAR_BATCH_SIZE = 64
+
+# Number of set bits of each byte value, for a table-driven popcount.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def split_filter(data: bytes | bytearray | memoryview) -> tuple[int, NDArray[np.uint8]]:
+    """
+    Given the bytes of a serialized rbloom filter, return the number of hash functions k
+    and the filter bits as a uint8 array sharing memory with `data` (no copy).
+    """
+    k = int.from_bytes(data[:HEADER_SIZE], byteorder="little")
+    return k, np.frombuffer(data, dtype=np.uint8, offset=HEADER_SIZE)
+
+
+def generate_indexes(digests: NDArray[np.uint8], k: int, size_in_bits: int) -> NDArray[np.uint64]:
+    """
+    Vectorized port of rbloom's index generation.
+    Given N hashes as raw big-endian digests with shape (N, 16), return the (N, k) bit indexes
+    that rbloom would set or test for them. The 128-bit LCG state is kept as four 32-bit limbs,
+    each in its own uint64 array, so that products never overflow.
+    Batches of up to `SCALAR_BATCH_SIZE` hashes are delegated to `generate_indexes_int`.
+    """
+    if len(digests) <= SCALAR_BATCH_SIZE:
+        scalar = [generate_indexes_int(int.from_bytes(digest.tobytes(), byteorder="big"), k, size_in_bits) for digest in digests]
+        return np.array(scalar, dtype=np.uint64).reshape(len(digests), k)
+
+    limbs = digests.view(">u4").astype(np.uint64)
+    state = [limbs[:, 3 - i] for i in range(4)]
+
+    indexes = np.empty((len(digests), k), dtype=np.uint64)
+    for j in range(k):
+        # state = state * LCG_MULTIPLIER + 1 (mod 2**128)
+        acc = [np.ones_like(state[0])] + [np.zeros_like(state[0]) for _ in range(3)]
+        for a in range(4):
+            for b in range(4 - a):
+                p = state[a] * _MULTIPLIER_LIMBS[b]
+                acc[a + b] += p & _MASK32
+                if a + b < 3:
+                    acc[a + b + 1] += p >> _SHIFT32
+        for i in range(3):
+            acc[i + 1] += acc[i] >> _SHIFT32
+            acc[i] &= _MASK32
+        acc[3] &= _MASK32
+        state = acc
+
+        # Index is (state >> 32) truncated to 64 bits, modulo the filter size.
+        indexes[:, j] = (state[1] | (state[2] << _SHIFT32)) % np.uint64(size_in_bits)
+    return indexes
+
+
+def generate_indexes_int(hash_value: int, k: int, size_in_bits: int) -> list[int]:
+    """
+    Scalar counterpart of `generate_indexes` for a single hash, using Python ints
+    for the 128-bit state. Cheaper than the vectorized version for one item.
+    """
+    state = hash_value & _MASK128
+    indexes = []
+    for _ in range(k):
+        state = (state * LCG_MULTIPLIER + 1) & _MASK128
+        indexes.append(((state >> 32) & _MASK64) % size_in_bits)
+    return indexes
+
+
+def set_bits(bits: NDArray[np.uint8], indexes: NDArray[np.uint64]):
+    """
+    Set the bits at `indexes` in the filter `bits`, in place.
+    """
+    indexes = indexes.ravel()
+    np.bitwise_or.at(bits, indexes >> np.uint64(3), np.left_shift(1, indexes & np.uint64(7)).astype(np.uint8))
+
+
+def get_bits(bits: NDArray[np.uint8], indexes: NDArray[np.uint64]) -> NDArray[np.bool_]:
+    """
+    Return True for each row of `indexes` whose bits are all set in the filter `bits`.
+    """
+    values = bits[indexes >> np.uint64(3)] >> (indexes & np.uint64(7)).astype(np.uint8)
+    return np.all(values & 1, axis=-1)
+
+
+def popcount(bits: NDArray[np.uint8]) -> NDArray[np.uint8]:
+    """
+    Return the number of set bits of each byte in `bits`.
+    """
+    return _POPCOUNT[bits]
+
+
+def count_bits(bits: NDArray[np.uint8]) -> int:
+    """
+    Return the number of set bits in the filter `bits`.
+    """
+    return int(popcount(bits).sum(dtype=np.int64))
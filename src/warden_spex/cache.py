@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    """
+    Cache statistics.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache, bounded by number of entries and by total size of the entries.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_size: int | None = None):
+        """
+        Create a cache holding at most `max_entries` entries, whose sizes sum up to at most `max_size`
+        (unbounded if None). Least recently used entries are evicted first.
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def get(self, key: K) -> V | None:
+        """
+        Return the value of `key`, marking it as recently used, or None if missing.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return entry[0]
+
+    def put(self, key: K, value: V, size: int = 1):
+        """
+        Insert `value` with `key` and `size`, evicting least recently used entries as needed.
+        Values larger than `max_size` are not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._stats.size -= self._entries.pop(key)[1]
+            if self.max_size is not None and size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self._stats.size += size
+            while len(self._entries) > self.max_entries or (self.max_size is not None and self._stats.size > self.max_size):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._stats.size -= evicted_size
+                self._stats.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries, keeping the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._stats.size = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Snapshot of hits, misses, evictions, number of entries and total size.
+        """
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                entries=len(self._entries),
+                size=self._stats.size,
+            )
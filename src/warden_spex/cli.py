@@ -0,0 +1,203 @@
+"""
+Batch verification: verify a stream of JSONL verifier requests with a task, in parallel,
+writing JSONL verifier responses and a throughput and latency summary (on stderr).
+
+warden-spex-verify my_package.tasks:MyTask --input requests.jsonl --output responses.jsonl
+cat requests.jsonl | warden-spex-verify my_package.tasks:MyTask --workers 8 --unordered > responses.jsonl
+"""
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import os
+import sys
+import time
+from array import array
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import IO, Any, get_type_hints
+
+import numpy as np
+
+from warden_spex.codec import read_jsonl, write_jsonl
+from warden_spex.models import MyBaseModel, Task, VerifierRequest, VerifierResponse
+from warden_spex.spex import InvalidValueException
+
+
+class IndexedVerifierResponse(MyBaseModel):
+    """
+    Verifier response, with the index of its request in the input (unordered output).
+    """
+
+    index: int
+    response: VerifierResponse
+
+
+def load_object(path: str) -> Any:
+    """
+    Import and return the object at `path`, as "package.module:Name" or "package.module.Name".
+    """
+    module_name, _, name = path.rpartition(":") if ":" in path else path.rpartition(".")
+    if not module_name:
+        raise InvalidValueException(f"Invalid import path: {path}")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def request_model(task: type[Task]) -> type[VerifierRequest]:
+    """
+    Return the request type annotated on the `verify` method of `task`, or `VerifierRequest`.
+    Parametrized generics (e.g., `VerifierRequest[MyOutput]`) are rejected: they can't be sent
+    to worker processes, and validate the solver request only as its bound.
+    """
+    hints = get_type_hints(inspect.unwrap(task.verify))
+    model = next((tp for name, tp in hints.items() if name != "return"), VerifierRequest)
+    if getattr(model, "__pydantic_generic_metadata__", {}).get("origin") is not None:
+        raise InvalidValueException(
+            f"request model {model.__name__} of {task.__name__}.verify is a parametrized generic: "
+            "annotate `verify` with a subclass of it, or pass --request-model"
+        )
+    return model
+
+
+def read_requests(stream: IO[bytes], model: type[VerifierRequest]) -> Iterator[VerifierRequest | InvalidValueException]:
+    """
+    Read verifier requests of type `model` from the JSONL lines of `stream`, as `read_jsonl` does.
+    Invalid lines are yielded as `InvalidValueException`, in place of their request.
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield from read_jsonl([line], model)
+        except InvalidValueException as ex:
+            yield InvalidValueException(f"Invalid JSONL line {line_number}: {ex.__cause__}")
+
+
+def verify_one(task: type[Task], request: VerifierRequest | InvalidValueException) -> tuple[VerifierResponse, float]:
+    """
+    Verify `request` with `task`, returning the response and the verification time in seconds.
+    Exceptions raised by the verifier, and invalid requests, are reported as failed verifications.
+    """
+    start = time.perf_counter()
+    if isinstance(request, InvalidValueException):
+        return VerifierResponse(countItems=0, isVerified=False, evidence=f"Invalid request: {request}"), time.perf_counter() - start
+    try:
+        response = task.verify(request)
+    except Exception as ex:  # pylint: disable=broad-exception-caught
+        response = VerifierResponse(countItems=0, isVerified=False, evidence=f"Verification error: {ex!r}")
+    return response, time.perf_counter() - start
+
+
+def verify_stream(
+    task: type[Task],
+    requests: Iterable[VerifierRequest | InvalidValueException],
+    executor: Executor,
+    max_pending: int,
+    ordered: bool = True,
+) -> Iterator[tuple[int, VerifierResponse, float]]:
+    """
+    Verify `requests` with `task` on `executor`, yielding `(index, response, seconds)` in input order
+    if `ordered`, in completion order otherwise. At most `max_pending` requests are read ahead.
+    """
+    iterator = enumerate(requests)
+    if ordered:
+        queue: deque[tuple[int, Future]] = deque()
+        while True:
+            for i, request in islice(iterator, max_pending - len(queue)):
+                queue.append((i, executor.submit(verify_one, task, request)))
+            if not queue:
+                return
+            i, future = queue.popleft()
+            yield i, *future.result()
+
+    pending: dict[Future, int] = {}
+    while True:
+        for i, request in islice(iterator, max_pending - len(pending)):
+            pending[executor.submit(verify_one, task, request)] = i
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), *future.result()
+
+
+def summary(latencies: array, count_verified: int, elapsed: float) -> str:
+    """
+    Return the throughput and latency summary of a batch verification.
+    """
+    count = len(latencies)
+    lines = [
+        f"requests...........: {count}",
+        f"verified...........: {count_verified}",
+        f"failed.............: {count - count_verified}",
+        f"elapsed............: {elapsed:.3f} s",
+        f"throughput.........: {count / elapsed if elapsed > 0 else 0:.1f} requests/s",
+    ]
+    if count:
+        p50, p95, p99 = np.percentile(np.frombuffer(latencies, dtype=np.float64), [50, 95, 99]) * 1000
+        lines.append(f"latency (ms).......: p50={p50:.2f} p95={p95:.2f} p99={p99:.2f} max={max(latencies) * 1000:.2f}")
+    return "\n".join(lines)
+
+
+def write_responses(
+    results: Iterable[tuple[int, VerifierResponse, float]],
+    stream: IO[bytes],
+    indexed: bool = False,
+) -> tuple[array, int]:
+    """
+    Write the responses of `results` to `stream` as JSONL, as `IndexedVerifierResponse` if `indexed`.
+    Return the verification times and the number of verified requests.
+    """
+    latencies = array("d")
+    count_verified = 0
+    for i, response, seconds in results:
+        latencies.append(seconds)
+        count_verified += response.isVerified
+        write_jsonl(stream, [IndexedVerifierResponse(index=i, response=response) if indexed else response])
+    stream.flush()
+    return latencies, count_verified
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("task", help="Import path of the Task, as package.module:Name")
+    parser.add_argument("--input", default="-", help="JSONL file of verifier requests (default: stdin)")
+    parser.add_argument("--output", default="-", help="JSONL file of verifier responses (default: stdout)")
+    parser.add_argument("--request-model", help="Import path of the verifier request type (default: from the task)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--max-pending", type=int, help="Maximum requests read ahead (default: 4 x workers)")
+    parser.add_argument("--unordered", action="store_true", help="Write responses as they complete, with their index")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Run the batch verification. The exit status is 1 if any request failed verification.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    try:
+        task = load_object(args.task)
+        model = load_object(args.request_model) if args.request_model else request_model(task)
+    except (ImportError, AttributeError, InvalidValueException) as ex:
+        parser.error(f"Cannot load {ex}")
+
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        input_stream = sys.stdin.buffer if args.input == "-" else stack.enter_context(open(args.input, "rb"))
+        output_stream = sys.stdout.buffer if args.output == "-" else stack.enter_context(open(args.output, "wb"))
+        executor = stack.enter_context(ProcessPoolExecutor(max_workers=args.workers))
+
+        requests = read_requests(input_stream, model)
+        results = verify_stream(task, requests, executor, args.max_pending or 4 * args.workers, not args.unordered)
+        latencies, count_verified = write_responses(results, output_stream, indexed=args.unordered)
+
+    print(summary(latencies, count_verified, time.perf_counter() - start), file=sys.stderr)
+    return 0 if count_verified == len(latencies) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
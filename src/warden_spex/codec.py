@@ -0,0 +1,52 @@
+from collections.abc import Iterable, Iterator
+from typing import IO, Any, TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+from warden_spex.spex import InvalidValueException
+
+T = TypeVar("T")
+
+_type_adapters: dict[Any, TypeAdapter] = {}
+
+
+def type_adapter(tp: Any) -> TypeAdapter:
+    """
+    Return the `TypeAdapter` of `tp`, built once per type.
+    """
+    adapter = _type_adapters.get(tp)
+    if adapter is None:
+        adapter = _type_adapters.setdefault(tp, TypeAdapter(tp))
+    return adapter
+
+
+def write_jsonl(stream: IO[bytes], items: Iterable[Any]) -> int:
+    """
+    Write `items` (e.g., requests and responses of `warden_spex.models`) to the binary `stream`
+    as JSONL, one JSON object per line, and return the number of written items.
+    Items are serialized one at a time, in constant memory.
+    """
+    count = 0
+    for item in items:
+        stream.write(type_adapter(type(item)).dump_json(item))
+        stream.write(b"\n")
+        count += 1
+    return count
+
+
+def read_jsonl(stream: IO[bytes] | Iterable[bytes], tp: type[T]) -> Iterator[T]:
+    """
+    Read items of type `tp` from the JSONL lines of the binary `stream`, one at a time, in constant memory.
+    Each line is parsed and validated in a single pass by pydantic-core, without intermediate dicts.
+    Fields typed with a generic parameter are validated as its bound: read with concrete types,
+    e.g. subclasses of `VerifierRequest` with a task-specific `solverRequest`.
+    Invalid lines raise `InvalidValueException`, with their line number.
+    """
+    adapter = type_adapter(tp)
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield adapter.validate_json(line)
+        except ValidationError as ex:
+            raise InvalidValueException(f"Invalid JSONL line {line_number}: {ex}") from ex
@@ -0,0 +1,5 @@
+from typing import Literal
+
+# Names of the hash functions of Bloom filter states (see `hash_int.INT_HASH_FUNCTIONS`).
+# Defined here, without importing NumPy, so that `warden_spex.models` stays light to import.
+HashFunctionName = Literal["sha256", "blake2b", "splitmix64", "tensor"]
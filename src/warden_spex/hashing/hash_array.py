@@ -1,7 +1,17 @@
+from dataclasses import dataclass
+
 import numpy as np
 from numpy.typing import NDArray
 
-from warden_spex.hashing.hash_int import hash_int
+from warden_spex.hashing.hash_int import hash_int, hash_int_digests
+from warden_spex.instrumentation import instrumented
+
+# Relative widening of the cells of `hash_array_grid`, absorbing the rounding errors of the
+# division by the cell width: values within epsilon share a hash as long as |a| / epsilon < ~1e9.
+_GRID_MARGIN = 2**-20
+
+# Largest number of hashes per element compared pairwise by `check_validity_csr`.
+_MAX_PAIRWISE_HASHES = 8
 
 
 def first_significant_digit_position(a: NDArray[np.float64]) -> NDArray[np.int64]:
@@ -23,6 +33,7 @@ def custom_arange(a: np.int64, b: np.int64, step: int = 1) -> NDArray[np.int64]:
     return np.arange(a, b + step, step)  # Ensure upper bound inclusion
 
 
+@instrumented("hash_array")
 def hash_array(a: NDArray[np.float64], epsilon: float = 0.0001) -> list[set[int]]:
     """
     HashArray:
@@ -46,9 +57,111 @@ def hash_array(a: NDArray[np.float64], epsilon: float = 0.0001) -> list[set[int]
     return h
 
 
+@instrumented("check_validity")
 def check_validity(h1: list[set[int]], h2: list[set[int]]) -> bool:
     """
     Checks whether there is at least one common hash value between corresponding sets in h1 and h2.
     """
     assert len(h1) == len(h2), "Hash lists must have the same length."
     return all(bool(h1[i] & h2[i]) for i in range(len(h1)))
+
+
+@dataclass(frozen=True)
+class HashArrayCSR:
+    """
+    Compact (CSR-style) representation of the output of `hash_array`: the hashes of element `i`
+    are the rows `hashes[offsets[i]:offsets[i + 1]]`, each row holding the high and low 64 bits
+    of a 128-bit hash.
+    """
+
+    hashes: NDArray[np.uint64]
+    offsets: NDArray[np.int64]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def to_sets(self) -> list[set[int]]:
+        """
+        Convert to the set-based representation returned by `hash_array`.
+        """
+        values = [(int(hi) << 64 | int(lo)) - ((int(hi) >> 63) << 128) for hi, lo in self.hashes]
+        return [set(values[self.offsets[i] : self.offsets[i + 1]]) for i in range(len(self))]
+
+
+@instrumented("hash_array_csr")
+def hash_array_csr(a: NDArray[np.float64], epsilon: float = 0.0001) -> HashArrayCSR:
+    """
+    HashArray, compact variant:
+    Same hashes as `hash_array`, stored as a flat array of hashes plus offsets and
+    computed without per-element Python loops.
+    """
+    n = first_significant_digit_position(np.array([epsilon]))
+
+    # Discretize lower and upper bounds, as in `hash_array`.
+    a_low = np.floor((a - epsilon) * 10**n).astype(np.int64)
+    a_high = np.floor((a + epsilon) * 10**n).astype(np.int64)
+    a_low, a_high = np.minimum(a_low, a_high), np.maximum(a_low, a_high)
+
+    # Concatenate all integer ranges in a single flat array.
+    lengths = a_high - a_low + 1
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    values = np.repeat(a_low, lengths) + (np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths))
+
+    hashes = hash_int_digests(values).view(">u8").astype(np.uint64)
+    return HashArrayCSR(hashes=hashes, offsets=offsets)
+
+
+@instrumented("check_validity_csr")
+def check_validity_csr(h1: HashArrayCSR, h2: HashArrayCSR) -> bool:
+    """
+    Vectorized `check_validity` for the compact representation: checks whether there is at least
+    one common hash value between corresponding elements in h1 and h2.
+    """
+    assert len(h1) == len(h2), "Hash lists must have the same length."
+    if len(h1) == 0:
+        return True
+
+    # Few hashes per element, as many for all elements (e.g., `hash_array_grid`): compare all pairs.
+    k = int(h1.offsets[1] - h1.offsets[0])
+    if 0 < k <= _MAX_PAIRWISE_HASHES and np.all(np.diff(h1.offsets) == k) and np.all(np.diff(h2.offsets) == k):
+        r1 = h1.hashes.reshape(-1, k, 1, 2)
+        r2 = h2.hashes.reshape(-1, 1, k, 2)
+        return bool(np.all(np.any(np.all(r1 == r2, axis=3), axis=(1, 2))))
+
+    # Rows of (element, high bits, low bits), deduplicated within each side.
+    keys = []
+    for h in (h1, h2):
+        elements = np.repeat(np.arange(len(h), dtype=np.uint64), np.diff(h.offsets))
+        keys.append(np.unique(np.column_stack((elements, h.hashes)), axis=0))
+
+    # After sorting, a hash shared by both sides for the same element appears in adjacent rows.
+    merged = np.concatenate(keys)
+    merged = merged[np.lexsort(merged.T[::-1])]
+    shared = np.all(merged[1:] == merged[:-1], axis=1)
+    return len(np.unique(merged[1:][shared, 0])) == len(h1)
+
+
+@instrumented("hash_array_grid")
+def hash_array_grid(a: NDArray[np.float64], epsilon: float = 0.0001, n_grids: int = 2) -> HashArrayCSR:
+    """
+    HashArray, bounded-cost variant:
+    Snaps each element to the cells of `n_grids` grids of width `n_grids * s`, offset from
+    each other by `s = epsilon / (n_grids - 1)`, and hashes the `n_grids` cells, regardless
+    of epsilon. Elements within epsilon share at least one hash; elements farther apart than
+    `n_grids * s` share none. Use `check_validity_csr` to compare the results.
+    """
+    if n_grids < 2:
+        raise ValueError("`n_grids` must be at least 2")
+
+    # Position of each element on the grid of step `s`.
+    s = epsilon / (n_grids - 1) * (1 + _GRID_MARGIN)
+    q = np.floor(np.asarray(a, dtype=np.float64) / s).astype(np.int64)
+
+    # The cell of grid `j` containing position `q` starts at the largest `m <= q` with
+    # `m = j (mod n_grids)`: over all grids, these are the positions `q - n_grids + 1, ..., q`.
+    # Two positions share a cell iff they are less than `n_grids` apart.
+    values = (q[:, np.newaxis] - np.arange(n_grids, dtype=np.int64)).reshape(-1)
+
+    hashes = hash_int_digests(values).view(">u8").astype(np.uint64)
+    offsets = np.arange(0, len(values) + 1, n_grids, dtype=np.int64)
+    return HashArrayCSR(hashes=hashes, offsets=offsets)
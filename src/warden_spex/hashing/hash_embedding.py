@@ -1,15 +1,20 @@
+from dataclasses import dataclass
+from functools import cache
 from itertools import combinations
 
 import numpy as np
 from numpy.typing import NDArray
 
-from warden_spex.hashing.hash_int import hash_int
+from warden_spex.bloom_bits import popcount
+from warden_spex.hashing.hash_int import hash_int, hash_int_batch, hash_int_digests_splitmix64
+from warden_spex.instrumentation import instrumented
 
 
 def euclidean(a, b):
     return np.sqrt(np.sum((np.array(a) - np.array(b)) ** 2))
 
 
+@instrumented("hash_embedding_m")
 def hash_embedding_m(A: NDArray[np.float64], V: NDArray[np.float64]) -> set[int]:
     """
     HashEmbeddingM:
@@ -30,6 +35,58 @@ def hash_embedding_m(A: NDArray[np.float64], V: NDArray[np.float64]) -> set[int]
     return {hash_int(c) for c in C}
 
 
+@cache
+def pair_indexes(m: int) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Return the index pairs (j, k) with j < k over `m` vantage points, in the order of
+    `combinations(range(m), 2)`. Cached per `m`.
+    """
+    j, k = np.triu_indices(m, k=1)
+    j.flags.writeable = False
+    k.flags.writeable = False
+    return j, k
+
+
+@cache
+def comparison_hashes(m: int) -> tuple[int, ...]:
+    """
+    Return the hashes of all comparison values `2 * i + bit` over `m` vantage points. Cached per `m`.
+    """
+    return tuple(hash_int_batch(np.arange(m * (m - 1), dtype=np.int64)))
+
+
+@instrumented("embedding_comparisons_m")
+def embedding_comparisons_m(A: NDArray[np.float64], V: NDArray[np.float64], batch_size: int = 16) -> NDArray[np.bool_]:
+    """
+    Batched comparisons of SPEX-LSH-M:
+    Given N embeddings A with shape (N, d) and vantage points V with shape (m, d), return the
+    (N, m(m-1)/2) outcomes `D[j] < D[k]` of the comparisons of each embedding, one byte each.
+    `hash_embedding_m` hashes the comparison values `2 * i + outcome`, where `i` is the column.
+    Distances are computed `batch_size` embeddings at a time to bound memory.
+    """
+    j, k = pair_indexes(len(V))
+    C = np.empty((len(A), len(j)), dtype=np.bool_)
+    for start in range(0, len(A), batch_size):
+        chunk = A[start : start + batch_size]
+        D = np.sqrt(np.sum((chunk[:, None, :] - V[None, :, :]) ** 2, axis=-1))
+        C[start : start + batch_size] = D[:, j] < D[:, k]
+    return C
+
+
+@instrumented("hash_embedding_m_batch")
+def hash_embedding_m_batch(A: NDArray[np.float64], V: NDArray[np.float64]) -> list[set[int]]:
+    """
+    HashEmbeddingM, batched:
+    Same hashes as calling `hash_embedding_m` on each row of A. Each distinct comparison value is
+    hashed once per `m`, and looked up for all embeddings.
+    A convenience for small batches: it builds N Python sets of m(m-1)/2 ints each, e.g. about
+    6 s for 10k embeddings and m=64. For large batches, use the compact `sketch_embedding_m`.
+    """
+    hashes = comparison_hashes(len(V))
+    offsets = 2 * np.arange(len(V) * (len(V) - 1) // 2)
+    return [{hashes[c] for c in row} for row in (offsets + embedding_comparisons_m(A, V)).tolist()]
+
+
 def jaccard_index(X: set[int], Y: set[int]) -> np.float64:
     """
     Compute Jaccard index of sets represented by arrays X and Y.
@@ -39,3 +96,173 @@ def jaccard_index(X: set[int], Y: set[int]) -> np.float64:
     union = len(X | Y)
 
     return np.float64(intersection / union if union != 0 else 0)
+
+
+@dataclass(frozen=True)
+class EmbeddingSketch:
+    """
+    Packed-bitset sketch of SPEX-LSH-M hashes over `m` vantage points: bit `i` of row `n` is the
+    outcome of the `i`-th comparison of embedding `n`, which fully describes the set of hashes
+    returned by `hash_embedding_m`. Two sets share the hash of comparison `i` if and only if
+    their bits `i` are equal.
+    """
+
+    bits: NDArray[np.uint8]
+    m: int
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    @property
+    def n_pairs(self) -> int:
+        return self.m * (self.m - 1) // 2
+
+    def to_sets(self) -> list[set[int]]:
+        """
+        Convert to the set-based representation returned by `hash_embedding_m`.
+        """
+        hashes = comparison_hashes(self.m)
+        comparisons = 2 * np.arange(self.n_pairs) + np.unpackbits(self.bits, axis=1, count=self.n_pairs)
+        return [{hashes[c] for c in row} for row in comparisons.tolist()]
+
+
+@instrumented("sketch_embedding_m")
+def sketch_embedding_m(A: NDArray[np.float64], V: NDArray[np.float64], batch_size: int = 4096) -> EmbeddingSketch:
+    """
+    Return the packed-bitset sketch of the SPEX-LSH-M hashes of the N embeddings A, with shape (N, d).
+    Comparisons are packed `batch_size` embeddings at a time, taking m(m-1)/16 bytes per embedding.
+    """
+    n_pairs = len(V) * (len(V) - 1) // 2
+    bits = np.empty((len(A), (n_pairs + 7) // 8), dtype=np.uint8)
+    for start in range(0, len(A), batch_size):
+        bits[start : start + batch_size] = np.packbits(embedding_comparisons_m(A[start : start + batch_size], V), axis=1)
+    return EmbeddingSketch(bits=bits, m=len(V))
+
+
+@instrumented("jaccard_index_many")
+def jaccard_index_many(X: EmbeddingSketch, Y: EmbeddingSketch, batch_size: int = 256) -> NDArray[np.float64]:
+    """
+    Compute the (len(X), len(Y)) matrix of Jaccard indexes between all pairs of sketches, equal to
+    `jaccard_index` on the corresponding sets. With h differing bits out of P comparisons, the sets
+    share P - h hashes out of P + h. Rows of X are processed `batch_size` at a time to bound memory.
+    """
+    assert X.m == Y.m, "Sketches must use the same number of vantage points."
+    n_pairs = X.n_pairs
+    similarity = np.zeros((len(X), len(Y)), dtype=np.float64)
+    if n_pairs == 0:
+        return similarity
+
+    for start in range(0, len(X), batch_size):
+        chunk = X.bits[start : start + batch_size]
+        H = popcount(chunk[:, None, :] ^ Y.bits[None, :, :]).sum(axis=-1, dtype=np.int64)
+        similarity[start : start + batch_size] = (n_pairs - H) / (n_pairs + H)
+    return similarity
+
+
+def jaccard_index_one(x: EmbeddingSketch, Y: EmbeddingSketch) -> NDArray[np.float64]:
+    """
+    Compute the Jaccard indexes between the single sketch `x` and each sketch in Y.
+    """
+    assert len(x) == 1, "Expected a single sketch."
+    return jaccard_index_many(x, Y)[0]
+
+
+@cache
+def simhash_hyperplanes(d: int, n_bits: int, seed: int = 0) -> NDArray[np.float64]:
+    """
+    Return the normals of `n_bits` random hyperplanes in `d` dimensions, with shape (d, n_bits).
+    Entries are random signs (+1 or -1, Rademacher rather than Gaussian) derived from splitmix64
+    hashes of `seed` and their position, so that solvers and verifiers draw the same hyperplanes
+    on any platform and NumPy version. `seed` must be in [0, 2**31). Cached per arguments.
+    """
+    if not 0 <= seed < 2**31:
+        raise ValueError("`seed` must be in [0, 2**31)")
+    if d * n_bits > 2**32:
+        raise ValueError("`d * n_bits` must be at most 2**32")
+    positions = (seed << 32) + np.arange(d * n_bits, dtype=np.int64)
+    signs = hash_int_digests_splitmix64(positions)[:, -1] & 1
+    H = np.where(signs, 1.0, -1.0).astype(np.float64).reshape(d, n_bits)
+    H.flags.writeable = False
+    return H
+
+
+@instrumented("simhash_bands")
+def simhash_bands(
+    A: NDArray[np.float64],
+    n_bands: int = 32,
+    band_bits: int = 2,
+    seed: int = 0,
+    batch_size: int = 4096,
+) -> NDArray[np.int64]:
+    """
+    SimHash with banding:
+    Given N embeddings A with shape (N, d), return the (N, n_bands) band values `2**band_bits * i + code`,
+    where `code` packs the signs of the projections of the embedding on the `band_bits` hyperplanes of
+    band `i`. With Gaussian hyperplanes, two embeddings with angle theta would agree on a hyperplane
+    with probability 1 - theta / pi, and on a band with probability (1 - theta / pi) ** band_bits;
+    with the random-sign normals of `simhash_hyperplanes` this holds only approximately, more closely
+    as d grows (and not for embeddings aligned with few coordinates). Projections are computed
+    `batch_size` embeddings at a time to bound memory.
+    """
+    if not 0 < band_bits <= 32:
+        raise ValueError("`band_bits` must be in [1, 32]")
+    A = np.atleast_2d(A)
+    H = simhash_hyperplanes(A.shape[1], n_bands * band_bits, seed)
+    weights = 1 << np.arange(band_bits, dtype=np.int64)
+    offsets = np.arange(n_bands, dtype=np.int64) << band_bits
+
+    bands = np.empty((len(A), n_bands), dtype=np.int64)
+    for start in range(0, len(A), batch_size):
+        signs = (A[start : start + batch_size] @ H >= 0).reshape(-1, n_bands, band_bits)
+        bands[start : start + batch_size] = offsets + signs @ weights
+    return bands
+
+
+@instrumented("hash_embedding_simhash_batch")
+def hash_embedding_simhash_batch(
+    A: NDArray[np.float64],
+    n_bands: int = 32,
+    band_bits: int = 2,
+    seed: int = 0,
+) -> list[set[int]]:
+    """
+    HashEmbeddingSimHash, batched:
+    Given N embeddings A with shape (N, d), return for each embedding the set of hashes of its
+    `n_bands` SimHash bands (see `simhash_bands`). Costs O(d * n_bands * band_bits) per embedding,
+    and yields `n_bands` hashes, against O(m * d + m**2) and m(m-1)/2 hashes for SPEX-LSH-M over
+    m vantage points. Sets can be compared with `jaccard_index`, or as bands with `jaccard_index_bands`.
+    Each distinct band value is hashed once.
+    """
+    bands = simhash_bands(A, n_bands=n_bands, band_bits=band_bits, seed=seed)
+    values, inverse = np.unique(bands, return_inverse=True)
+    hashes = hash_int_batch(values)
+    rows: NDArray[np.int64] = inverse.reshape(bands.shape)
+    return [{hashes[i] for i in row} for row in rows.tolist()]
+
+
+def hash_embedding_simhash(A: NDArray[np.float64], n_bands: int = 32, band_bits: int = 2, seed: int = 0) -> set[int]:
+    """
+    HashEmbeddingSimHash:
+    Given an embedding A, return the set of hashes of its `n_bands` SimHash bands.
+    """
+    return hash_embedding_simhash_batch(np.asarray(A)[np.newaxis], n_bands=n_bands, band_bits=band_bits, seed=seed)[0]
+
+
+@instrumented("jaccard_index_bands")
+def jaccard_index_bands(X: NDArray[np.int64], Y: NDArray[np.int64], batch_size: int = 256) -> NDArray[np.float64]:
+    """
+    Compute the (len(X), len(Y)) matrix of Jaccard indexes between all pairs of rows of band values
+    returned by `simhash_bands`, equal to `jaccard_index` on the corresponding sets of hashes.
+    With s equal bands out of B, the sets share s hashes out of 2B - s. Rows of X are processed
+    `batch_size` at a time to bound memory.
+    """
+    assert X.shape[1] == Y.shape[1], "Band values must have the same number of bands."
+    n_bands = X.shape[1]
+    similarity = np.zeros((len(X), len(Y)), dtype=np.float64)
+    if n_bands == 0:
+        return similarity
+
+    for start in range(0, len(X), batch_size):
+        shared = np.sum(X[start : start + batch_size, None, :] == Y[None, :, :], axis=-1)
+        similarity[start : start + batch_size] = shared / (2 * n_bands - shared)
+    return similarity
@@ -1,8 +1,28 @@
-from hashlib import sha256
+import functools
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from hashlib import blake2b, sha256
 
 import numpy as np
 from numpy.typing import NDArray
 
+from warden_spex.hashing import HashFunctionName
+from warden_spex.instrumentation import instrumented
+
+_MASK64 = (1 << 64) - 1
+_SIGN128 = 1 << 127
+
+# Constants of the splitmix64 generator (increment and finalizer multipliers).
+# https://prng.di.unimi.it/splitmix64.c
+_GOLDEN = 0x9E3779B97F4A7C15
+_MIX1 = 0xBF58476D1CE4E5B9
+_MIX2 = 0x94D049BB133111EB
+
+# Size of the chunks of `hash_tensor`, hashed in parallel as the leaves of a hash tree.
+TENSOR_CHUNK_SIZE = 1 << 20
+
 
 def hash_int(value: np.int64 | NDArray[np.int64]) -> int:
     """
@@ -22,3 +42,186 @@ def hash_int(value: np.int64 | NDArray[np.int64]) -> int:
     # https://github.com/KenanHanke/rbloom?tab=readme-ov-file#documentation
     v_hash = int.from_bytes(sha256(v_mem.tobytes()).digest()[:16], byteorder="big", signed=True)
     return v_hash
+
+
+@instrumented("hash_int_digests")
+def hash_int_digests(values: NDArray[np.int64]) -> NDArray[np.uint8]:
+    """
+    Given an array of N ints, it returns their N hashes as raw digests, with shape (N, 16).
+    Row `i` holds the big-endian bytes of `hash_int(values[i])`; arrays with more than one
+    dimension are reduced to one int per row, as `hash_int` does for a single array.
+    """
+
+    # Encoding all values at once, in the same memory layout used by `hash_int`.
+    v_mem = memoryview(_encode_rows(values))
+
+    # One C-level digest per value, no intermediate numpy scalars or Python ints.
+    v_hashes = b"".join([sha256(v_mem[i : i + 8]).digest()[:16] for i in range(0, len(v_mem), 8)])
+    return np.frombuffer(v_hashes, dtype=np.uint8).reshape(-1, 16)
+
+
+def hash_int_blake2b(value: np.int64 | NDArray[np.int64]) -> int:
+    """
+    Given an array of ints, it returns its _single_ hash, as BLAKE2b with a 16-byte digest
+    of the same memory layout hashed by `hash_int`.
+
+    Security: BLAKE2b is a cryptographic hash as strong as SHA-256 for this use (finding
+    colliding states or states that set chosen bits is infeasible). It is cheaper than `hash_int`,
+    mostly on single states, where it skips the intermediate numpy array.
+    """
+    return int.from_bytes(blake2b(_encode(value), digest_size=16).digest(), byteorder="big", signed=True)
+
+
+@instrumented("hash_int_digests_blake2b")
+def hash_int_digests_blake2b(values: NDArray[np.int64]) -> NDArray[np.uint8]:
+    """
+    Given an array of N ints, it returns their N `hash_int_blake2b` hashes as raw digests, with shape (N, 16).
+    """
+    v_mem = memoryview(_encode_rows(values))
+    v_hashes = b"".join([blake2b(v_mem[i : i + 8], digest_size=16).digest() for i in range(0, len(v_mem), 8)])
+    return np.frombuffer(v_hashes, dtype=np.uint8).reshape(-1, 16)
+
+
+def hash_int_splitmix64(value: np.int64 | NDArray[np.int64]) -> int:
+    """
+    Given an array of ints, it returns its _single_ hash, as two consecutive outputs of the
+    splitmix64 generator seeded with the int (high and low 64 bits).
+
+    Security: splitmix64 is not a cryptographic hash. It is a bijection on 64-bit ints, so
+    distinct states never collide, but it is trivially invertible: anyone can construct
+    states that set chosen bits of a filter. Use it only when states are not chosen by the
+    party being verified (e.g., they are derived from the task). In exchange, its batch
+    version is vectorized and more than an order of magnitude faster than the cryptographic options.
+    """
+    x = int.from_bytes(_encode(value), byteorder="little")
+    v_hash = _splitmix64(x) << 64 | _splitmix64((x + _GOLDEN) & _MASK64)
+    return v_hash - (v_hash & _SIGN128) * 2
+
+
+@instrumented("hash_int_digests_splitmix64")
+def hash_int_digests_splitmix64(values: NDArray[np.int64]) -> NDArray[np.uint8]:
+    """
+    Given an array of N ints, it returns their N `hash_int_splitmix64` hashes as raw digests, with shape (N, 16).
+    """
+    x = np.frombuffer(_encode_rows(values), dtype="<u8").astype(np.uint64)
+    v_hashes = np.empty((len(x), 2), dtype=">u8")
+    v_hashes[:, 0] = _splitmix64_array(x)
+    v_hashes[:, 1] = _splitmix64_array(x + np.uint64(_GOLDEN))
+    return v_hashes.view(np.uint8).reshape(-1, 16)
+
+
+def hash_tensor(value: np.ndarray | np.generic, chunk_size: int = TENSOR_CHUNK_SIZE) -> int:
+    """
+    Given an array of any shape and numeric dtype, it returns its _single_ hash, over its raw bytes,
+    dtype and shape: distinct arrays do not collide, unlike with `hash_int`, which sums them up.
+
+    The bytes are read through a `memoryview`, without copies if the array is C-contiguous.
+    They are hashed with SHA-256 as a hash tree: chunks of `chunk_size` bytes are the leaves,
+    hashed in parallel threads (hashlib releases the GIL), and their digests are combined
+    in the root. Dtype and shape are bound to every node.
+
+    Security: the tree is a cryptographic hash like SHA-256, as nodes are domain-separated by
+    kind (leaf or root), position and number of leaves.
+    """
+    return int.from_bytes(_tensor_digest(value, chunk_size), byteorder="big", signed=True)
+
+
+@instrumented("hash_tensor_digests")
+def hash_tensor_digests(values: np.ndarray) -> NDArray[np.uint8]:
+    """
+    Given an array of N tensors (one per row), it returns their N `hash_tensor` hashes as raw digests, with shape (N, 16).
+    """
+    v_hashes = b"".join([_tensor_digest(row, TENSOR_CHUNK_SIZE) for row in np.asarray(values)])
+    return np.frombuffer(v_hashes, dtype=np.uint8).reshape(-1, 16)
+
+
+@dataclass(frozen=True)
+class IntHashFunction:
+    """
+    Hash function for states of Bloom filters: `hash_int` hashes a single state (the rbloom callback),
+    and `digests` hashes N states at once as raw big-endian digests, with shape (N, 16).
+    If `reduces`, array states are reduced to their sum before hashing.
+    """
+
+    name: HashFunctionName
+    code: int
+    hash_int: Callable[[np.int64 | NDArray[np.int64]], int]
+    digests: Callable[[NDArray[np.int64]], NDArray[np.uint8]]
+    reduces: bool = True
+
+
+# Hash functions selectable by name. Codes identify them in binary encodings and must not change.
+INT_HASH_FUNCTIONS: dict[str, IntHashFunction] = {
+    "sha256": IntHashFunction(name="sha256", code=0, hash_int=hash_int, digests=hash_int_digests),
+    "blake2b": IntHashFunction(name="blake2b", code=1, hash_int=hash_int_blake2b, digests=hash_int_digests_blake2b),
+    "splitmix64": IntHashFunction(name="splitmix64", code=2, hash_int=hash_int_splitmix64, digests=hash_int_digests_splitmix64),
+    "tensor": IntHashFunction(name="tensor", code=3, hash_int=hash_tensor, digests=hash_tensor_digests, reduces=False),
+}
+
+
+def hash_int_batch(values: NDArray[np.int64], hash_function: HashFunctionName = "sha256") -> list[int]:
+    """
+    Given an array of N ints, it returns their N hashes, bit-identical to calling the scalar
+    `hash_function` (`hash_int` by default) on each of them.
+    """
+    v_hashes = INT_HASH_FUNCTIONS[hash_function].digests(values).tobytes()
+    return [int.from_bytes(v_hashes[i : i + 16], byteorder="big", signed=True) for i in range(0, len(v_hashes), 16)]
+
+
+def _encode(value: np.int64 | NDArray[np.int64]) -> bytes:
+    # Same memory layout of `hash_int`, without intermediate numpy arrays.
+    v_sum = value if isinstance(value, np.int64) else np.sum(value)
+    return (int(v_sum) & _MASK64).to_bytes(8, byteorder="little")
+
+
+def _encode_rows(values: NDArray[np.int64]) -> bytes:
+    # Same memory layout of `hash_int` for each row, in a single buffer.
+    values = np.asarray(values)
+    if values.ndim > 1:
+        values = values.sum(axis=tuple(range(1, values.ndim)))
+    return np.ascontiguousarray(values.astype("<u8")).tobytes()
+
+
+def _splitmix64(x: int) -> int:
+    x = (x + _GOLDEN) & _MASK64
+    x = ((x ^ (x >> 30)) * _MIX1) & _MASK64
+    x = ((x ^ (x >> 27)) * _MIX2) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _splitmix64_array(x: NDArray[np.uint64]) -> NDArray[np.uint64]:
+    x = x + np.uint64(_GOLDEN)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(_MIX1)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(_MIX2)
+    return x ^ (x >> np.uint64(31))
+
+
+@functools.cache
+def _tensor_executor() -> ThreadPoolExecutor | None:
+    # Threads only pay off with multiple cores.
+    n_cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    return ThreadPoolExecutor(max_workers=n_cores, thread_name_prefix="hash_tensor") if n_cores > 1 else None
+
+
+def _tensor_digest(value: np.ndarray | np.generic, chunk_size: int) -> bytes:
+    # Unlike `np.ascontiguousarray`, `np.require` keeps 0-d arrays (and scalars) 0-d, with shape ().
+    array = np.require(value, requirements="C")
+    if array.dtype.hasobject:
+        raise TypeError("Arrays of objects can't be hashed by their bytes")
+    header = f"{array.dtype.str}{array.shape}".encode()
+    data = array.reshape(-1).view(np.uint8).data
+    n_chunks = max(-(-len(data) // chunk_size), 1)
+
+    # Merkle tree of depth 2: leaves hash the chunks, the root hashes their digests. Each node
+    # is prefixed by its kind, the header with dtype and shape, and (leaves) its position.
+    def leaf(i: int) -> bytes:
+        node = sha256(b"\x00" + header + i.to_bytes(8, byteorder="little"))
+        node.update(data[i * chunk_size : (i + 1) * chunk_size])
+        return node.digest()
+
+    executor = _tensor_executor() if n_chunks > 1 else None
+    leaves = executor.map(leaf, range(n_chunks)) if executor is not None else map(leaf, range(n_chunks))
+    root = sha256(b"\x01" + header + n_chunks.to_bytes(8, byteorder="little"))
+    for digest in leaves:
+        root.update(digest)
+    return root.digest()[:16]
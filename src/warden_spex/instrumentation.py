@@ -0,0 +1,162 @@
+import functools
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Protocol, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Sink(Protocol):
+    """
+    Receiver of instrumentation events, provided by the user.
+    """
+
+    def on_span(self, name: str, seconds: float, failed: bool) -> None:
+        """
+        Called when the span `name` ends after `seconds`; `failed` if it raised an exception.
+        """
+
+    def on_counter(self, name: str, value: int) -> None:
+        """
+        Called when the counter `name` is incremented by `value`.
+        """
+
+
+class _State:
+    # Immutable tuple, replaced on changes, so that readers need no lock.
+    sinks: tuple[Sink, ...] = ()
+
+
+_state = _State()
+_lock = threading.Lock()
+
+
+def add_sink(sink: Sink):
+    """
+    Start sending instrumentation events to `sink`.
+    """
+    with _lock:
+        _state.sinks = (*_state.sinks, sink)
+
+
+def remove_sink(sink: Sink):
+    """
+    Stop sending instrumentation events to `sink`.
+    """
+    with _lock:
+        _state.sinks = tuple(s for s in _state.sinks if s is not sink)
+
+
+def is_enabled() -> bool:
+    """
+    Return True if at least one sink is receiving events.
+    """
+    return bool(_state.sinks)
+
+
+@contextmanager
+def sink_context(sink: Sink) -> Iterator[Sink]:
+    """
+    Send instrumentation events to `sink` within the context.
+    """
+    add_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_sink(sink)
+
+
+def increment(name: str, value: int = 1):
+    """
+    Increment the counter `name` by `value`. No-op if no sink is registered.
+    """
+    for sink in _state.sinks:
+        sink.on_counter(name, value)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time the enclosed block as span `name`.
+    """
+    sinks = _state.sinks
+    if not sinks:
+        yield
+        return
+
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        seconds = time.perf_counter() - start
+        for sink in sinks:
+            sink.on_span(name, seconds, failed)
+
+
+def instrumented(name: str) -> Callable[[F], F]:
+    """
+    Decorator timing each call of the function as span `name`. When no sink is registered,
+    the only overhead is one extra call and an empty-tuple check.
+    """
+
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            sinks = _state.sinks
+            if not sinks:
+                return fn(*args, **kwargs)
+
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                for sink in sinks:
+                    sink.on_span(name, seconds, failed)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@dataclass
+class SpanStats:
+    """
+    Aggregated statistics of a span.
+    """
+
+    calls: int = 0
+    failures: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+@dataclass
+class MetricsRecorder:
+    """
+    Sink aggregating spans and counters in memory.
+    """
+
+    spans: dict[str, SpanStats] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def on_span(self, name: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            stats = self.spans.setdefault(name, SpanStats())
+            stats.calls += 1
+            stats.failures += failed
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def on_counter(self, name: str, value: int) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
@@ -1,16 +1,24 @@
 import json
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from collections.abc import Callable
+from typing import ClassVar, Generic, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from warden_spex.hashing import HashFunctionName
+from warden_spex.instrumentation import instrumented
+from warden_spex.state_cache import StateCache
+
 TypeSolverInput = TypeVar("TypeSolverInput", bound=BaseModel)
 TypeSolverOutput = TypeVar("TypeSolverOutput", bound=BaseModel)
 T = TypeVar("T", bound=BaseModel)
+S = TypeVar("S")
 
 
 class MyBaseModel(BaseModel):
-    model_config = ConfigDict(extra="forbid")  # noqa: F841
+    # Validators and serializers are built on first use rather than at import time,
+    # keeping the cold start of short-lived workers and CLI invocations low.
+    model_config = ConfigDict(extra="forbid", defer_build=True)  # noqa: F841
 
     def pprint(self):
         print(self.__class__.__name__ + json.dumps(self.model_dump(), indent=4, default=str))
@@ -29,13 +37,14 @@ class SolverRequest(MyBaseModel, Generic[TypeSolverInput]):
 
 class SolverProof(MyBaseModel):
     """
-    Solver proof as bloom filter and number of inserted items.
+    Solver proof as bloom filter, number of inserted items, and hash function of the bloom filter.
     """
 
     model_config = ConfigDict(extra="forbid")
 
     bloomFilter: bytes = b"BgAAAAAAAADYxCJU"
     countItems: int = Field(default=1, ge=0)
+    hashFunction: HashFunctionName = "sha256"
 
 
 class SolverResponse(MyBaseModel, Generic[TypeSolverOutput]):
@@ -53,6 +62,9 @@ class VerifierRequest(MyBaseModel, Generic[TypeSolverOutput]):
     """
     Verifier request, with solver request and solver proof as
     input, as well as `verificationRatio` to control the minimum required confidence.
+    Alternatively, `verificationConfidence` sets the target probability of detecting a
+    lazy solver that skipped `lazySkipFraction` of the states, taking precedence over
+    `verificationRatio` (see `warden_spex.sampling.count_samples`).
     """
 
     model_config = ConfigDict(extra="forbid")
@@ -61,6 +73,8 @@ class VerifierRequest(MyBaseModel, Generic[TypeSolverOutput]):
     solverOutput: TypeSolverOutput | None = None
     solverProof: SolverProof = SolverProof()
     verificationRatio: float = Field(default=0.1, ge=0, le=1)
+    verificationConfidence: float | None = Field(default=None, gt=0, lt=1)
+    lazySkipFraction: float = Field(default=0.01, gt=0, le=1)
 
 
 class VerifierResponse(MyBaseModel):
@@ -81,6 +95,20 @@ class Task(Generic[TypeSolverInput, TypeSolverOutput], ABC):
     Abstract class for solver tasks (solver, verifier).
     """
 
+    # When set, `cached_state` keeps the states recomputed by verifiers in this cache,
+    # shared across requests. Tasks opt in by computing their states with `cached_state`.
+    state_cache: ClassVar[StateCache | None] = None
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Instrument `solve` and `verify` of subclasses, as spans "<TaskClass>.solve" and "<TaskClass>.verify".
+        """
+        super().__init_subclass__(**kwargs)
+        for name in ("solve", "verify"):
+            method = cls.__dict__.get(name)
+            if isinstance(method, staticmethod) and not getattr(method.__func__, "__isabstractmethod__", False):
+                setattr(cls, name, staticmethod(instrumented(f"{cls.__name__}.{name}")(method.__func__)))
+
     @staticmethod
     @abstractmethod
     def solve(request: SolverRequest[TypeSolverInput]) -> SolverResponse[TypeSolverOutput]:  # noqa: F841
@@ -90,3 +118,40 @@ class Task(Generic[TypeSolverInput, TypeSolverOutput], ABC):
     @abstractmethod
     def verify(request: VerifierRequest) -> VerifierResponse:  # noqa: F841
         raise NotImplementedError
+
+    @classmethod
+    async def solve_async(cls, request: SolverRequest[TypeSolverInput]) -> SolverResponse[TypeSolverOutput]:
+        """
+        Asynchronous `solve`. By default, it runs `solve` in a worker thread;
+        tasks with native asynchronous solvers can override it.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        return await asyncio.to_thread(cls.solve, request)
+
+    @classmethod
+    async def verify_async(cls, request: VerifierRequest) -> VerifierResponse:
+        """
+        Asynchronous `verify`. By default, it runs `verify` in a worker thread;
+        tasks with native asynchronous verifiers can override it.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        return await asyncio.to_thread(cls.verify, request)
+
+    @classmethod
+    def cached_state(
+        cls,
+        solver_input: BaseModel | None,
+        i: int,
+        compute_state: Callable[[int], S],
+        resume_state: Callable[[int, S, int], S] | None = None,
+    ) -> S:
+        """
+        Return the `i`-th state for `solver_input`, computed with `compute_state(i)`. If `state_cache`
+        is set, states are cached, and `resume_state(j, state_j, i)` (if provided) resumes the
+        computation from the nearest cached state `j < i` (see `StateCache.compute`).
+        """
+        if cls.state_cache is None:
+            return compute_state(i)
+        return cls.state_cache.compute(cls, solver_input, i, compute_state, resume_state)
@@ -0,0 +1,73 @@
+import os
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, TypeVar
+
+import numpy as np
+
+from warden_spex.models import VerifierResponse
+from warden_spex.spex import Blossom
+
+T = TypeVar("T")
+
+
+class VerificationRunner:
+    """
+    Parallel re-execution of the sampled states of a verifier, with early cancellation.
+    """
+
+    def __init__(self, executor: Executor | None = None, max_pending: int | None = None):
+        """
+        Run re-executions on `executor` (a process pool by default, owned by the runner), keeping
+        at most `max_pending` of them submitted at any time so that a miss cancels the rest cheaply.
+        """
+        self.executor = executor or ProcessPoolExecutor()
+        self.max_pending = max_pending or 2 * (os.cpu_count() or 1)
+        self._owns_executor = executor is None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.shutdown()
+
+    def shutdown(self):
+        """
+        Shut down the executor, if owned by the runner.
+        """
+        if self._owns_executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    def run(
+        self,
+        blossom: Blossom,
+        samples: Iterable[T],
+        compute_state: Callable[[T], Any],
+        evidence: str = "Missing state for sample {}",
+    ) -> VerifierResponse:
+        """
+        Recompute the state of each of `samples` with `compute_state` in parallel, and look it up
+        in `blossom`. At the first miss, outstanding work is cancelled and a failed response is
+        returned, with `evidence` formatted with the missing sample. `countItems` is the number
+        of lookups performed.
+        """
+        count_lookups = 0
+        iterator = iter(samples)
+        pending: dict[Future, T] = {}
+        try:
+            while True:
+                for sample in islice(iterator, self.max_pending - len(pending)):
+                    pending[self.executor.submit(compute_state, sample)] = sample
+                if not pending:
+                    return VerifierResponse(countItems=count_lookups, isVerified=True)
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sample = pending.pop(future)
+                    count_lookups += 1
+                    if not blossom.is_hit(np.asarray(future.result())):
+                        return VerifierResponse(countItems=count_lookups, isVerified=False, evidence=evidence.format(sample))
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,129 @@
+import math
+from collections.abc import Iterable
+from typing import Literal
+
+from warden_spex.models import VerifierRequest
+from warden_spex.spex import InvalidValueException
+
+Verdict = Literal["accept", "reject", "continue"]
+
+
+def detection_probability(skip_fraction: float, false_positive_rate: float) -> float:
+    """
+    Return the probability that a single sampled state exposes a lazy solver that skipped
+    `skip_fraction` of the states: the state was skipped, and its lookup is not a false positive
+    of a Bloom filter with `false_positive_rate`.
+    """
+    return skip_fraction * (1 - false_positive_rate)
+
+
+def min_samples(
+    confidence: float,
+    skip_fraction: float,
+    false_positive_rate: float,
+    count_items: int | None = None,
+) -> int:
+    """
+    Return the minimum number of samples that detect, with probability at least `confidence`,
+    a lazy solver that skipped `skip_fraction` of the states, given the `false_positive_rate`
+    of its proof. The number does not depend on the number of states: it is capped to
+    `count_items`, if provided, as sampling all states is the most a verifier can do.
+    Samples are assumed to be drawn with replacement; drawing them without replacement
+    only increases the detection probability, so the result is conservative.
+    """
+    if not 0 < confidence < 1:
+        raise InvalidValueException("`confidence` must be in (0, 1)")
+    q = detection_probability(skip_fraction, false_positive_rate)
+    if q <= 0:
+        raise InvalidValueException("A lazy solver with this skip fraction and false positive rate can't be detected")
+
+    n = 1 if q >= 1 else math.ceil(math.log1p(-confidence) / math.log1p(-q))
+    return n if count_items is None else min(n, count_items)
+
+
+def count_samples(request: VerifierRequest, false_positive_rate: float) -> int:
+    """
+    Return the number of states to sample for `request`: the minimum number reaching its
+    `verificationConfidence` against a lazy solver skipping `lazySkipFraction` of the states,
+    given the `false_positive_rate` of its proof; or, if no confidence is set, the fraction
+    `verificationRatio` of the proof items.
+    """
+    count_items = request.solverProof.countItems
+    if request.verificationConfidence is None:
+        return math.ceil(count_items * request.verificationRatio)
+    return min_samples(request.verificationConfidence, request.lazySkipFraction, false_positive_rate, count_items)
+
+
+class SequentialTest:
+    """
+    Sequential probability ratio test on the outcomes of sampled lookups, stopping as soon as
+    they are conclusive. It tells an honest solver, whose states miss with probability `miss_rate`,
+    from a lazy solver that skipped `skip_fraction` of the states. A lazy solver is accepted with
+    probability at most `1 - confidence`, an honest one rejected with probability at most
+    `false_rejection_rate`.
+    https://doi.org/10.1214/aoms/1177731118 (Wald 1945)
+
+    With `miss_rate=0`, any miss rejects, and acceptance takes exactly `min_samples` hits.
+    With `miss_rate>0` (e.g., states recomputed approximately), a few misses are tolerated,
+    and on average fewer samples are needed than with a fixed-size plan.
+    """
+
+    def __init__(
+        self,
+        confidence: float,
+        skip_fraction: float,
+        false_positive_rate: float,
+        miss_rate: float = 0.0,
+        false_rejection_rate: float = 0.01,
+    ):
+        p_lazy = miss_rate + (1 - miss_rate) * detection_probability(skip_fraction, false_positive_rate)
+        if not 0 < confidence < 1:
+            raise InvalidValueException("`confidence` must be in (0, 1)")
+        if p_lazy <= miss_rate:
+            raise InvalidValueException("A lazy solver with this skip fraction and false positive rate can't be told apart")
+
+        # An honest solver never misses if `miss_rate` is 0, so it can't be rejected.
+        alpha = false_rejection_rate if miss_rate > 0 else 0.0
+        beta = 1 - confidence
+        self.upper = math.log((1 - beta) / alpha) if alpha > 0 else math.inf
+        self.lower = math.log(beta / (1 - alpha))
+        self.hit_llr = math.log1p(-p_lazy) - math.log1p(-miss_rate) if p_lazy < 1 else -math.inf
+        self.miss_llr = math.log(p_lazy / miss_rate) if miss_rate > 0 else math.inf
+        self.llr = 0.0
+        self.n_samples = 0
+        self.n_misses = 0
+
+    def update(self, is_hit: bool) -> Verdict:
+        """
+        Record the outcome of one sampled lookup, and return "accept" or "reject" once
+        the outcomes are conclusive, "continue" otherwise.
+        """
+        self.n_samples += 1
+        if is_hit:
+            self.llr += self.hit_llr
+        else:
+            self.n_misses += 1
+            self.llr += self.miss_llr
+        return self.verdict
+
+    def run(self, hits: Iterable[bool]) -> Verdict:
+        """
+        Record the outcomes `hits` of sampled lookups, in order, until they are conclusive,
+        and return the verdict. Outcomes are consumed lazily: samples after the verdict are
+        never looked up if `hits` is a generator.
+        """
+        for is_hit in hits:
+            if self.update(bool(is_hit)) != "continue":
+                break
+        return self.verdict
+
+    @property
+    def verdict(self) -> Verdict:
+        """
+        Current verdict, from the outcomes recorded so far.
+        """
+        if self.llr >= self.upper:
+            return "reject"
+        if self.llr <= self.lower:
+            return "accept"
+        return "continue"
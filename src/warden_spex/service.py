@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import logging
+import os
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from warden_spex.models import SolverProof, Task, VerifierRequest, VerifierResponse
+from warden_spex.spex import Blossom, ScalableBlossom, decoded_proofs
+
+log = logging.getLogger(__name__)
+
+
+class VerificationService:
+    """
+    Asyncio verification service: verifies batches of requests with bounded concurrency,
+    streaming responses back as they complete.
+    """
+
+    def __init__(self, task: Task, max_concurrency: int | None = None, executor: Executor | None = None):
+        """
+        Verify requests with `task`, running at most `max_concurrency` verifications at once
+        (by default, the size of the default thread pool of asyncio, past which they would queue).
+
+        By default, verifications run with `task.verify_async`, i.e. `task.verify` in worker threads,
+        and share the proofs decoded by `verify_many`. CPU-bound verifiers hold the GIL, though,
+        and can run `task.verify` on `executor` instead (not owned by the service), with
+        `max_concurrency` matching its workers. A thread pool still shares decoded proofs. A process
+        pool runs verifications in parallel, but proofs are sent to the workers with their requests,
+        and decoded there by each verification: `verify_many` does not decode them upfront.
+        """
+        self.task = task
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(max_concurrency or min(32, (os.cpu_count() or 1) + 4))
+        self._shares_proofs = executor is None or isinstance(executor, ThreadPoolExecutor)
+
+    async def verify(self, request: VerifierRequest) -> VerifierResponse:
+        """
+        Verify a single request, waiting for a free concurrency slot.
+        Exceptions raised by the verifier are reported as failed verifications.
+        """
+        async with self.semaphore:
+            try:
+                return await self._verify(request)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                log.exception("Verification failed with an exception")
+                return VerifierResponse(countItems=0, isVerified=False, evidence=f"Verification error: {ex!r}")
+
+    async def _verify(self, request: VerifierRequest) -> VerifierResponse:
+        if self.executor is None:
+            return await self.task.verify_async(request)
+        loop = asyncio.get_running_loop()
+        if self._shares_proofs:
+            # In the current context, as `asyncio.to_thread` does, to see the proofs decoded by `verify_many`.
+            return await loop.run_in_executor(self.executor, contextvars.copy_context().run, self.task.verify, request)
+        return await loop.run_in_executor(self.executor, self.task.verify, request)
+
+    async def verify_many(self, requests: Iterable[VerifierRequest]) -> AsyncIterator[tuple[int, VerifierResponse]]:
+        """
+        Verify `requests`, yielding `(index, response)` pairs in completion order.
+        Proofs are decoded once per distinct proof across the batch, before verifications start
+        (unless they run in a process pool, see `VerificationService`).
+        Proofs that fail to decode are left to fail in the verification of their requests.
+        """
+        requests = list(requests)
+        context = contextvars.copy_context()
+        if self._shares_proofs:
+            # Verifications run in a context where `Blossom.load` shares decoded proofs.
+            memo: dict[tuple[bytes, int, str], Blossom | ScalableBlossom] = {}
+            context.run(decoded_proofs.set, memo)
+
+            proofs = {(r.solverProof.bloomFilter, r.solverProof.countItems, r.solverProof.hashFunction): r.solverProof for r in requests}
+            await asyncio.to_thread(context.run, _decode_proofs, proofs.values())
+            log.debug(f"Decoded {len(proofs)} distinct proofs for {len(requests)} requests")
+
+        pending = {asyncio.create_task(self.verify(request), context=context): i for i, request in enumerate(requests)}
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+def _decode_proofs(proofs: Iterable[SolverProof]):
+    # Decode `proofs` with `Blossom.load`, sharing them through `decoded_proofs`, skipping invalid ones.
+    for proof in proofs:
+        try:
+            Blossom.load(proof)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            log.debug(f"Skipped decoding of an invalid proof: {ex!r}")
@@ -1,101 +1,737 @@
 import base64
 import logging
+import os
+import struct
+import zlib
 from collections.abc import Iterable
+from contextvars import ContextVar
+from hashlib import sha256
+from itertools import islice
+from typing import TYPE_CHECKING, Any, ClassVar, Literal
 
 import numpy as np
-from rbloom import Bloom  # pylint: disable=no-name-in-module
+from numpy.typing import NDArray
 
-from warden_spex.hashing.hash_int import hash_int
+from warden_spex.bloom_bits import HEADER_SIZE, count_bits, generate_indexes, generate_indexes_int, get_bits, set_bits, split_filter
+from warden_spex.cache import LRUCache
+from warden_spex.hashing.hash_int import INT_HASH_FUNCTIONS, HashFunctionName
+from warden_spex.instrumentation import increment, instrumented
 from warden_spex.models import SolverProof
 
+if TYPE_CHECKING:
+    from rbloom import Bloom  # pylint: disable=no-name-in-module
+
 log = logging.getLogger(__name__)
 
 
 class InvalidValueException(Exception): ...
 
 
-class Blossom:
+def _bloom_type() -> type["Bloom"]:
+    # rbloom is imported on first use: verifiers querying serialized proofs in place never need it.
+    from rbloom import Bloom  # pylint: disable=import-outside-toplevel,no-name-in-module,redefined-outer-name
+
+    return Bloom
+
+
+# When set, `Blossom.load` decodes each distinct proof once and returns the same instance,
+# keyed by filter bytes, number of items and hash function. Used to share decoding across a batch of requests.
+decoded_proofs: ContextVar[dict[tuple[bytes, int, str], "Blossom | ScalableBlossom"] | None] = ContextVar("decoded_proofs", default=None)
+
+# Binary proof encoding: header, followed by the filter as serialized by rbloom (k, bits),
+# optionally zlib-compressed. The header holds magic, version, codec, code of the hash
+# function, filter size in bits and number of inserted items. Version 1 headers have no
+# hash function code, and imply SHA-256.
+BINARY_MAGIC = b"SPXB"
+BINARY_VERSION = 2
+_BINARY_HEADER = struct.Struct("<4sBBBQQ")
+_BINARY_HEADER_V1 = struct.Struct("<4sBBQQ")
+_CODEC_RAW = 0
+_CODEC_ZLIB = 1
+
+# Serialization of scalable Bloom filters: header with magic, version, number of filters and the
+# parameters that size new filters (initial items, false positive rate, growth, tightening), followed
+# by number of items, capacity and size of each filter, and its rbloom serialization. Version 1
+# has no parameters nor capacities. The magic can't be confused with the header of an rbloom
+# filter (k as little-endian u64).
+SCALABLE_MAGIC = b"SPXS"
+SCALABLE_VERSION = 2
+_SCALABLE_HEADER = struct.Struct("<4sBIQdId")
+_SCALABLE_FILTER = struct.Struct("<QQQ")
+_SCALABLE_HEADER_V1 = struct.Struct("<4sBI")
+_SCALABLE_FILTER_V1 = struct.Struct("<QQ")
+_SCALABLE_PARAMETERS = ("initial_items", "false_positive_rate", "growth", "tightening")
+
+_READ_ONLY_MESSAGE = "Bloom filter is read-only, e.g. shared by `Blossom.load` across verifications"
+
+
+def proof_digest(proof: SolverProof) -> bytes:
+    """
+    Return the digest identifying `proof`, over its filter bytes, number of items and hash function.
+    """
+    return sha256(proof.bloomFilter + b":" + str(proof.countItems).encode() + b":" + proof.hashFunction.encode()).digest()
+
+
+class Blossom:  # pylint: disable=too-many-public-methods
     """
     Bloom filter with additional capabilities used by SPEX.
     """
 
+    # When set, `Blossom.load` keeps decoded proofs in this cache, keyed by `proof_digest` and
+    # sized by their decoded bytes. Together with the verdicts memoized by each instance, repeated
+    # verifications of the same proof skip decoding and false positive rate estimation.
+    proof_cache: ClassVar[LRUCache[bytes, "Blossom | ScalableBlossom"] | None] = None
+
     def __init__(
         self,
         expected_items: int = 1000,
         false_positive_rate: float = 0.01,
+        hash_function: HashFunctionName = "sha256",
     ):
         """
-        Create a Bloom filter with a certain number of expected items inserted, and
-        an acceptable false positive rate.
+        Create a Bloom filter with a certain number of expected items inserted, an acceptable
+        false positive rate, and the hash function of its states (see `INT_HASH_FUNCTIONS`
+        for the trade-offs between speed and security of each of them).
         """
 
+        if hash_function not in INT_HASH_FUNCTIONS:
+            raise InvalidValueException(f"Unsupported hash function: {hash_function}")
+        if expected_items <= 0:
+            raise InvalidValueException("`expected_items` must be greater than 0")
+        if not 0 < false_positive_rate < 1:
+            raise InvalidValueException("`false_positive_rate` must be in (0, 1)")
         self.inserted_items = 0
         self.expected_items = expected_items
+        self._false_positive_rate = false_positive_rate
+        self._hash = INT_HASH_FUNCTIONS[hash_function]
+        # Verdicts and bit density, memoized until the filter changes.
+        self._memo: dict[tuple, Any] = {}
+        self.read_only = False
 
-        self.bloom = Bloom(
-            expected_items=expected_items,
-            false_positive_rate=false_positive_rate,
-            hash_func=hash_int,
-        )
+        # The filter as serialized by rbloom (k, bits), queried and updated in place: a `bytearray`
+        # owned by this instance, or a read-only view of a loaded proof, copied on the first mutation.
+        # The empty filter is sized by rbloom on first access.
+        self._buffer: bytearray | memoryview | None = None
+
+    @property
+    def hash_function(self) -> HashFunctionName:
+        """
+        Name of the hash function of the states.
+        """
+        return self._hash.name
+
+    @property
+    def bloom(self) -> "Bloom":
+        """
+        An rbloom filter with the bits of this Bloom filter. It is a copy: changes to it
+        do not affect this Bloom filter, unless assigned back to `bloom`.
+        """
+        return _bloom_type().load_bytes(bytes(self._serialized()), hash_func=self._hash.hash_int)
+
+    @bloom.setter
+    def bloom(self, bloom: "Bloom"):
+        self._check_writable()
+        self._buffer = bytearray(bloom.save_bytes())
+        self._memo.clear()
+
+    def freeze(self):
+        """
+        Make the Bloom filter read-only: further insertions and merges raise `InvalidValueException`.
+        """
+        self.read_only = True
+
+    def _check_writable(self):
+        if self.read_only:
+            raise InvalidValueException(_READ_ONLY_MESSAGE)
+
+    def _serialized(self) -> bytearray | memoryview:
+        if self._buffer is None:
+            bloom = _bloom_type()(
+                expected_items=self.expected_items,
+                false_positive_rate=self._false_positive_rate,
+                hash_func=self._hash.hash_int,
+            )
+            self._buffer = bytearray(bloom.save_bytes())
+        return self._buffer
+
+    def _writable_buffer(self) -> bytearray:
+        # Filter to update in place, copying a loaded proof once on its first mutation.
+        self._check_writable()
+        if not isinstance(self._buffer, bytearray):
+            self._buffer = bytearray(self._serialized())
+        self._memo.clear()
+        return self._buffer
+
+    def _filter(self) -> tuple[int, NDArray[np.uint8]]:
+        return split_filter(self._serialized())
+
+    def serialized(self) -> memoryview:
+        """
+        Return the filter as serialized by rbloom (k, bits), as a read-only view without copy
+        that reflects later changes to the filter.
+        """
+        return memoryview(self._serialized()).toreadonly()
 
+    @instrumented("blossom.dump")
     def dump(self) -> bytes:
         """
         Serialize Bloom filter to a Base64 sequence of bytes.
         """
-        return base64.b64encode(self.bloom.save_bytes())
+        return base64.b64encode(self._serialized())
+
+    @instrumented("blossom.dump_binary")
+    def dump_binary(self, compress: bool = False, level: int = 6) -> bytes:
+        """
+        Serialize Bloom filter, number of inserted items and hash function to the compact binary
+        encoding, optionally zlib-compressed with `level` (effective on sparse filters).
+        """
+        data = self._serialized()
+        size_in_bits = (len(data) - HEADER_SIZE) * 8
+        codec = _CODEC_ZLIB if compress else _CODEC_RAW
+        header = _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, codec, self._hash.code, size_in_bits, self.inserted_items)
+        return header + (zlib.compress(data, level) if compress else data)
+
+    @classmethod
+    @instrumented("blossom.load_binary")
+    def load_binary(cls, data: bytes | memoryview):
+        """
+        Load a Bloom filter from the compact binary encoding. Uncompressed filters are queried
+        in place, without copying `data`, which must not change while in use.
+        """
+        data = memoryview(data)
+        header = _BINARY_HEADER_V1 if len(data) > 4 and data[4] == 1 else _BINARY_HEADER
+        if len(data) < header.size:
+            raise InvalidValueException("Binary proof is truncated")
+        if header is _BINARY_HEADER_V1:
+            magic, version, codec, size_in_bits, count_items = header.unpack_from(data)
+            hash_code = INT_HASH_FUNCTIONS["sha256"].code
+        else:
+            magic, version, codec, hash_code, size_in_bits, count_items = header.unpack_from(data)
+        if magic != BINARY_MAGIC or version not in (1, BINARY_VERSION):
+            raise InvalidValueException(f"Unsupported binary proof: magic={magic!r} version={version}")
+        hash_function = next((f.name for f in INT_HASH_FUNCTIONS.values() if f.code == hash_code), None)
+        if hash_function is None:
+            raise InvalidValueException(f"Unsupported binary proof hash function: {hash_code}")
+
+        payload = data[header.size :]
+        if codec == _CODEC_ZLIB:
+            payload = memoryview(zlib.decompress(payload))
+        elif codec != _CODEC_RAW:
+            raise InvalidValueException(f"Unsupported binary proof codec: {codec}")
+        if len(payload) != HEADER_SIZE + size_in_bits // 8:
+            raise InvalidValueException("Binary proof size does not match its header")
+
+        return cls.from_serialized(payload, count_items, hash_function)
+
+    @classmethod
+    def from_serialized(cls, data: bytes | memoryview, inserted_items: int, hash_function: HashFunctionName = "sha256"):
+        """
+        Load a Bloom filter serialized by rbloom, with `inserted_items` items and `hash_function`.
+        The filter is queried in place, without copying `data`, which must not change while in use.
+        """
+        blossom = cls(hash_function=hash_function)
+        blossom._buffer = memoryview(data)
+        blossom.inserted_items = inserted_items
+        return blossom
 
+    @instrumented("blossom.is_hit")
     def is_hit(self, array: np.ndarray) -> bool:
         """
         Return True if the input `array` is a hit in the Bloom filter.
         """
-        return array in self.bloom
+        data = self._serialized()
+        k = int.from_bytes(data[:HEADER_SIZE], byteorder="little")
+        indexes = generate_indexes_int(self._hash.hash_int(array), k, (len(data) - HEADER_SIZE) * 8)
+        return all(data[HEADER_SIZE + (i >> 3)] >> (i & 7) & 1 for i in indexes)
+
+    @instrumented("blossom.is_hit_batch")
+    def is_hit_batch(self, batch: NDArray[np.int64]) -> NDArray[np.bool_]:
+        """
+        Return a boolean mask with True for each state of `batch` (one per row) that is a hit
+        in the Bloom filter, with the same outcome of `is_hit` on each of them.
+        """
+        batch = np.atleast_1d(batch)
+        increment("blossom.lookups", len(batch))
+        k, bits = self._filter()
+        return self._hits(batch, k, bits)
+
+    @instrumented("blossom.first_miss")
+    def first_miss(self, batch: NDArray[np.int64], batch_size: int = 4096) -> int | None:
+        """
+        Return the index of the first state of `batch` (one per row) that is not a hit
+        in the Bloom filter, or None if all states are hits. States are checked in chunks
+        of `batch_size`, stopping at the first chunk that contains a miss.
+        """
+        batch = np.atleast_1d(batch)
+        k, bits = self._filter()
+        for start in range(0, len(batch), batch_size):
+            chunk = batch[start : start + batch_size]
+            increment("blossom.lookups", len(chunk))
+            misses = np.flatnonzero(~self._hits(chunk, k, bits))
+            if len(misses) > 0:
+                return start + int(misses[0])
+        return None
+
+    def _hits(self, batch: NDArray[np.int64], k: int, bits: NDArray[np.uint8]) -> NDArray[np.bool_]:
+        return get_bits(bits, generate_indexes(self._hash.digests(batch), k, len(bits) * 8))
 
+    @instrumented("blossom.add")
     def add(self, array: np.ndarray):
         """
         Add `array` to the Bloom filter.
         """
+        self._check_writable()
         if self.inserted_items + 1 > self.expected_items:
             raise InvalidValueException("Bloom filter is full, increase `expected_items`")
+        data = self._writable_buffer()
+        k = int.from_bytes(data[:HEADER_SIZE], byteorder="little")
+        for i in generate_indexes_int(self._hash.hash_int(array), k, (len(data) - HEADER_SIZE) * 8):
+            data[HEADER_SIZE + (i >> 3)] |= 1 << (i & 7)
         self.inserted_items += 1
-        self.bloom.add(array)
 
-    def add_items(self, items: Iterable):
+    @instrumented("blossom.add_batch")
+    def add_batch(self, batch: NDArray[np.int64]) -> int:
+        """
+        Add all states in `batch` to the Bloom filter at once, one state per row.
+        Capacity is checked once, hashes are computed together and the filter bits are
+        set in place with vectorized operations. The resulting filter is identical to the one
+        obtained adding states one by one. Return the number of inserted items.
+        """
+        self._check_writable()
+        batch = np.atleast_1d(batch)
+        count = len(batch)
+        if self.inserted_items + count > self.expected_items:
+            raise InvalidValueException("Bloom filter is full, increase `expected_items`")
+        if count == 0:
+            return 0
+
+        k, bits = split_filter(self._writable_buffer())
+        set_bits(bits, generate_indexes(self._hash.digests(batch), k, len(bits) * 8))
+        self.inserted_items += count
+        increment("blossom.items_added", count)
+        return count
+
+    def add_items(self, items: NDArray[np.int64] | Iterable, batch_size: int = 65536) -> int:
+        """
+        Add `items` to the Bloom filter, and return the number of inserted items.
+        A NumPy array is inserted as a single batch, one state per row. Other iterables
+        are consumed in chunks of `batch_size` states, each inserted as a batch.
+        """
+
+        if isinstance(items, np.ndarray):
+            return self.add_batch(items)
+
+        count = 0
+        iterator = iter(items)
+        while chunk := list(islice(iterator, batch_size)):
+            count += self.add_batch(_chunk_states(chunk, self._hash.reduces))
+        return count
+
+    def merge(self, other: "Blossom"):
+        """
+        Merge `other` into this Bloom filter, as the bitwise union of their bits.
+        Both filters must have been created with the same parameters and hash function.
+        """
+        self._check_writable()
+        if self.inserted_items + other.inserted_items > self.expected_items:
+            raise InvalidValueException("Bloom filter is full, increase `expected_items`")
+        k, bits = self._filter()
+        other_k, other_bits = split_filter(other.serialized())
+        if other.hash_function != self.hash_function or other_k != k or len(other_bits) != len(bits):
+            raise InvalidValueException("Cannot merge Bloom filters with different parameters or hash functions")
+        _, bits = split_filter(self._writable_buffer())
+        np.bitwise_or(bits, other_bits, out=bits)
+        self.inserted_items += other.inserted_items
+
+    @classmethod
+    def build_sharded(
+        cls,
+        states: NDArray[np.int64],
+        expected_items: int,
+        false_positive_rate: float = 0.01,
+        n_shards: int | None = None,
+        hash_function: HashFunctionName = "sha256",
+    ):
         """
-        Add `items` to the Bloom filter.
+        Build a Bloom filter with `states` (one per row) in parallel: each of `n_shards` worker
+        processes fills a same-parameter shard from a slice of `states`, and the shards are
+        merged with a bitwise union. The result is identical to inserting all states serially.
         """
+        n_shards = n_shards or os.cpu_count() or 1
+        blossom = cls(expected_items=expected_items, false_positive_rate=false_positive_rate, hash_function=hash_function)
+        if blossom.inserted_items + len(states) > expected_items:
+            raise InvalidValueException("Bloom filter is full, increase `expected_items`")
+
+        from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
 
-        for item in items:
-            self.add(item)
+        slices = [s for s in np.array_split(states, n_shards) if len(s) > 0]
+        with ProcessPoolExecutor(max_workers=len(slices) or 1) as executor:
+            futures = [executor.submit(_build_shard, s, expected_items, false_positive_rate, hash_function) for s in slices]
+            for future in futures:
+                shard_bytes, inserted_items = future.result()
+                blossom.merge(cls.from_serialized(shard_bytes, inserted_items, hash_function))
+        return blossom
 
     @classmethod
-    def load(cls, proof: SolverProof):
+    @instrumented("blossom.load")
+    def load(cls, proof: SolverProof) -> "Blossom | ScalableBlossom":
         """
-        Load `proof` Bloom filter.
+        Load `proof` Bloom filter, with the hash function recorded in the proof.
+        Proofs of scalable Bloom filters are loaded as `ScalableBlossom`.
+        Filters shared through `decoded_proofs` or `proof_cache` are read-only (see `freeze`).
         """
-        blossom = cls()
-        blossom.bloom = Bloom.load_bytes(base64.b64decode(proof.bloomFilter), hash_func=hash_int)
-        blossom.inserted_items = proof.countItems
+        memo = decoded_proofs.get()
+        key = (proof.bloomFilter, proof.countItems, proof.hashFunction)
+        if memo is not None and key in memo:
+            return memo[key]
+
+        cache = Blossom.proof_cache
+        digest = proof_digest(proof) if cache is not None else b""
+        if cache is not None and (cached := cache.get(digest)) is not None:
+            return cached
+
+        data = base64.b64decode(proof.bloomFilter)
+        blossom: Blossom | ScalableBlossom
+        if data[: len(SCALABLE_MAGIC)] == SCALABLE_MAGIC:
+            blossom = ScalableBlossom.from_serialized(data, proof.hashFunction)
+            if blossom.inserted_items != proof.countItems:
+                raise InvalidValueException("Scalable Bloom filter items do not match `countItems`")
+        else:
+            blossom = cls.from_serialized(data, proof.countItems, proof.hashFunction)
+
+        if memo is not None or cache is not None:
+            blossom.freeze()
+        if memo is not None:
+            memo[key] = blossom
+        if cache is not None:
+            cache.put(digest, blossom, size=len(data))
         return blossom
 
-    def estimate_false_positive_rate(self):
+    def bit_density(self) -> tuple[int, int, int]:
+        """
+        Return the number of hash functions k, the filter size in bits m, and the number of set bits.
+        Memoized until the filter changes.
+        """
+        key = ("bit_density",)
+        if key not in self._memo:
+            k, bits = self._filter()
+            self._memo[key] = (k, len(bits) * 8, count_bits(bits))
+        return self._memo[key]
+
+    @instrumented("blossom.estimate_false_positive_rate")
+    def estimate_false_positive_rate(
+        self,
+        method: Literal["analytic", "montecarlo"] = "analytic",
+        n_probes: int = 100000,
+        seed: int | None = None,
+    ) -> float:
         """
         Estimate the false positive rate of the current Bloom filter.
+        The "analytic" method computes it from the fraction of set bits as (set/m)^k.
+        The "montecarlo" method measures it with `n_probes` random lookups, seeded by `seed`.
         """
-        hits = 0
-        n = 100000
+        if method == "montecarlo":
+            rng = np.random.default_rng(seed)
+            random_ints = rng.integers(low=1, high=2**32, size=n_probes)
+            return float(np.mean(self.is_hit_batch(random_ints)))
 
-        rng = np.random.default_rng()
-        random_ints = rng.integers(low=1, high=2**32, size=n)
-        for i in range(n):
-            hits += random_ints[i] in self.bloom
+        k, m, set_bits_count = self.bit_density()
+        return (set_bits_count / m) ** k
 
-        estimated = hits / n
-        return estimated
+    def estimate_inserted_items(self) -> tuple[float, float]:
+        """
+        Estimate the number of items inserted in the Bloom filter from its fraction of set bits,
+        returning the estimate and its standard deviation.
+        https://doi.org/10.1021/ci600358f (Swamidass, Baldi 2007)
+        """
+        k, m, set_bits_count = self.bit_density()
+        if set_bits_count == m:
+            return np.inf, np.inf
+
+        estimated = -m / k * np.log1p(-set_bits_count / m)
+        p_unset = (m - set_bits_count) / m
+        variance = m * p_unset * (1 - (1 + k * estimated / m) * p_unset)
+        return float(estimated), float(np.sqrt(max(variance, 0)) / (k * p_unset))
 
-    def verify_false_positive_rate(self, expected_rate=0.01, tolerance=0.01):
+    @instrumented("blossom.verify_false_positive_rate")
+    def verify_false_positive_rate(self, expected_rate=0.01, tolerance=0.01, count_tolerance=None, method="analytic"):
         """
         Decide if the estimated false positive rate is consistent with the expected value.
+        If `count_tolerance` is set (opt-in), also decide if the number of inserted items estimated
+        from the filter is within `count_tolerance` standard deviations (plus one item) of the claimed
+        `inserted_items`. The count check assumes distinct states: repeated states, or states that
+        `hash_int` reduces to the same sum, set no new bits, so honest proofs with repeats fail it.
+        Verdicts are memoized until the filter changes.
+        """
+        key = (expected_rate, tolerance, count_tolerance, method)
+        if key not in self._memo:
+            self._memo[key] = _verify_estimates(self, expected_rate, tolerance, count_tolerance, method)
+        return self._memo[key]
+
+
+class ScalableBlossom:  # pylint: disable=too-many-instance-attributes
+    """
+    Scalable Bloom filter, for solvers that do not know the number of states in advance.
+    It chains Bloom filters of growing capacity, allocated as the previous one fills up, with
+    tightening false positive rates so that the overall rate stays within `false_positive_rate`.
+    https://doi.org/10.1016/j.ipl.2006.10.007 (Almeida et al. 2007)
+    """
+
+    def __init__(
+        self,
+        initial_items: int = 1000,
+        false_positive_rate: float = 0.01,
+        growth: int = 2,
+        tightening: float = 0.5,
+        hash_function: HashFunctionName = "sha256",
+    ):
+        """
+        Create a scalable Bloom filter whose first filter holds `initial_items` items, and each
+        next one `growth` times more. Filter `i` has false positive rate
+        `false_positive_rate * (1 - tightening) * tightening**i`, summing up to `false_positive_rate`.
+        All filters use `hash_function`.
+        """
+        self.initial_items = initial_items
+        self.false_positive_rate = false_positive_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.hash_function = hash_function
+        self.filters: list[Blossom] = []
+        self.inserted_items = 0
+        self.read_only = False
+        self._verdicts: dict[tuple, bool] = {}
+
+    def _grow(self) -> Blossom:
+        i = len(self.filters)
+        blossom = Blossom(
+            expected_items=self.initial_items * self.growth**i,
+            false_positive_rate=self.false_positive_rate * (1 - self.tightening) * self.tightening**i,
+            hash_function=self.hash_function,
+        )
+        self.filters.append(blossom)
+        return blossom
+
+    def freeze(self):
+        """
+        Make the Bloom filter read-only, as `Blossom.freeze` does.
+        """
+        self.read_only = True
+        for blossom in self.filters:
+            blossom.freeze()
+
+    def _current(self) -> Blossom:
+        if self.read_only:
+            raise InvalidValueException(_READ_ONLY_MESSAGE)
+        if not self.filters or self.filters[-1].inserted_items >= self.filters[-1].expected_items:
+            return self._grow()
+        return self.filters[-1]
+
+    def add(self, array: np.ndarray):
+        """
+        Add `array` to the Bloom filter.
+        """
+        self._current().add(array)
+        self.inserted_items += 1
+        self._verdicts.clear()
+
+    def add_batch(self, batch: NDArray[np.int64]) -> int:
+        """
+        Add all states in `batch` to the Bloom filter at once, one state per row,
+        filling the current filter and allocating new ones as needed.
+        Return the number of inserted items.
+        """
+        batch = np.atleast_1d(batch)
+        start = 0
+        while start < len(batch):
+            blossom = self._current()
+            start += blossom.add_batch(batch[start : start + blossom.expected_items - blossom.inserted_items])
+        self.inserted_items += len(batch)
+        self._verdicts.clear()
+        return len(batch)
+
+    def add_items(self, items: NDArray[np.int64] | Iterable, batch_size: int = 65536) -> int:
+        """
+        Add `items` to the Bloom filter, as `Blossom.add_items` does.
+        """
+        if isinstance(items, np.ndarray):
+            return self.add_batch(items)
+
+        count = 0
+        reduces = INT_HASH_FUNCTIONS[self.hash_function].reduces
+        iterator = iter(items)
+        while chunk := list(islice(iterator, batch_size)):
+            count += self.add_batch(_chunk_states(chunk, reduces))
+        return count
+
+    def is_hit(self, array: np.ndarray) -> bool:
+        """
+        Return True if the input `array` is a hit in any of the Bloom filters.
+        """
+        return any(blossom.is_hit(array) for blossom in self.filters)
+
+    def is_hit_batch(self, batch: NDArray[np.int64]) -> NDArray[np.bool_]:
+        """
+        Return a boolean mask with True for each state of `batch` (one per row) that is a hit.
+        """
+        batch = np.atleast_1d(batch)
+        mask = np.zeros(len(batch), dtype=np.bool_)
+        for blossom in self.filters:
+            mask |= blossom.is_hit_batch(batch)
+        return mask
+
+    def first_miss(self, batch: NDArray[np.int64], batch_size: int = 4096) -> int | None:
+        """
+        Return the index of the first state of `batch` (one per row) that is not a hit,
+        or None if all states are hits, as `Blossom.first_miss` does.
+        """
+        batch = np.atleast_1d(batch)
+        for start in range(0, len(batch), batch_size):
+            misses = np.flatnonzero(~self.is_hit_batch(batch[start : start + batch_size]))
+            if len(misses) > 0:
+                return start + int(misses[0])
+        return None
+
+    def dump(self) -> bytes:
+        """
+        Serialize the scalable Bloom filter to a Base64 sequence of bytes: magic, version, number
+        of filters and parameters, followed by the number of items, capacity, size and rbloom
+        serialization of each filter.
+        """
+        header = _SCALABLE_HEADER.pack(
+            SCALABLE_MAGIC,
+            SCALABLE_VERSION,
+            len(self.filters),
+            *(getattr(self, name) for name in _SCALABLE_PARAMETERS),
+        )
+        parts: list[bytes | memoryview] = [header]
+        for blossom in self.filters:
+            data = blossom.serialized()
+            parts.append(_SCALABLE_FILTER.pack(blossom.inserted_items, blossom.expected_items, len(data)))
+            parts.append(data)
+        return base64.b64encode(b"".join(parts))
+
+    @classmethod
+    def from_serialized(cls, data: bytes | memoryview, hash_function: HashFunctionName = "sha256") -> "ScalableBlossom":
+        """
+        Load a scalable Bloom filter from its serialization (without Base64), with `hash_function`,
+        querying each filter in place. Version 1 serializations lack the parameters to grow the
+        filter, and are loaded read-only.
+        """
+        data = memoryview(data)
+        v1 = len(data) > 4 and data[4] == 1
+        header = _SCALABLE_HEADER_V1 if v1 else _SCALABLE_HEADER
+        if len(data) < header.size:
+            raise InvalidValueException("Scalable Bloom filter is truncated")
+        magic, version, n_filters, *values = header.unpack_from(data)
+        if magic != SCALABLE_MAGIC or version not in (1, SCALABLE_VERSION):
+            raise InvalidValueException(f"Unsupported scalable Bloom filter: magic={magic!r} version={version}")
+
+        # Version 1 has no parameters (`values` is empty), and keeps the defaults.
+        scalable = cls(**dict(zip(_SCALABLE_PARAMETERS, values, strict=False)), hash_function=hash_function)
+        offset = header.size
+        for _ in range(n_filters):
+            blossom, offset = _load_scalable_filter(data, offset, v1, hash_function)
+            scalable.filters.append(blossom)
+            scalable.inserted_items += blossom.inserted_items
+        if v1:
+            scalable.freeze()
+        return scalable
+
+    def estimate_false_positive_rate(
+        self,
+        method: Literal["analytic", "montecarlo"] = "analytic",
+        n_probes: int = 100000,
+        seed: int | None = None,
+    ) -> float:
+        """
+        Estimate the overall false positive rate, as `Blossom.estimate_false_positive_rate` does.
+        Analytically, a lookup is a false positive if it is one in any of the filters.
+        """
+        if method == "montecarlo":
+            rng = np.random.default_rng(seed)
+            random_ints = rng.integers(low=1, high=2**32, size=n_probes)
+            return float(np.mean(self.is_hit_batch(random_ints)))
+
+        rates = [blossom.estimate_false_positive_rate() for blossom in self.filters]
+        return float(1 - np.prod([1 - rate for rate in rates]))
+
+    def estimate_inserted_items(self) -> tuple[float, float]:
+        """
+        Estimate the number of inserted items and its standard deviation, summing over all filters.
+        """
+        estimates = [blossom.estimate_inserted_items() for blossom in self.filters]
+        return float(sum(e for e, _ in estimates)), float(np.sqrt(sum(std**2 for _, std in estimates)))
+
+    def verify_false_positive_rate(self, expected_rate=0.01, tolerance=0.01, count_tolerance=None, method="analytic"):
         """
-        estimated = self.estimate_false_positive_rate()
-        logging.debug(f"estimated={estimated} expected={expected_rate} tolerance={tolerance}")
-        return expected_rate + tolerance >= estimated
+        Decide if the estimated false positive rate (and, if `count_tolerance` is set, number of items)
+        is consistent with the expected values, as `Blossom.verify_false_positive_rate` does.
+        """
+        key = (expected_rate, tolerance, count_tolerance, method)
+        if key not in self._verdicts:
+            self._verdicts[key] = _verify_estimates(self, expected_rate, tolerance, count_tolerance, method)
+        return self._verdicts[key]
+
+
+def _load_scalable_filter(data: memoryview, offset: int, v1: bool, hash_function: HashFunctionName) -> tuple[Blossom, int]:
+    """
+    Load the filter of a scalable Bloom filter serialization at `offset`, and return it with the offset of the next one.
+    Version 1 filters have no capacity, and are sized by their number of items.
+    """
+    filter_header = _SCALABLE_FILTER_V1 if v1 else _SCALABLE_FILTER
+    if offset + filter_header.size > len(data):
+        raise InvalidValueException("Scalable Bloom filter is truncated")
+    count_items, *capacity, size = filter_header.unpack_from(data, offset)
+    offset += filter_header.size
+    if offset + size > len(data):
+        raise InvalidValueException("Scalable Bloom filter is truncated")
+    blossom = Blossom.from_serialized(data[offset : offset + size], count_items, hash_function)
+    blossom.expected_items = capacity[0] if capacity else count_items
+    return blossom, offset + size
+
+
+def _verify_estimates(
+    blossom: Blossom | ScalableBlossom,
+    expected_rate: float,
+    tolerance: float,
+    count_tolerance: float | None,
+    method: Literal["analytic", "montecarlo"],
+) -> bool:
+    estimated = blossom.estimate_false_positive_rate(method=method)
+    log.debug(f"estimated={estimated} expected={expected_rate} tolerance={tolerance}")
+    if count_tolerance is not None:
+        estimated_items, std_items = blossom.estimate_inserted_items()
+        log.debug(f"estimated_items={estimated_items} std_items={std_items} inserted_items={blossom.inserted_items}")
+        if abs(estimated_items - blossom.inserted_items) > count_tolerance * std_items + 1:
+            return False
+    return expected_rate + tolerance >= estimated
+
+
+def _chunk_states(chunk: list, reduces: bool) -> np.ndarray:
+    """
+    Stack a chunk of items into a batch, one state per row. With a hash function that reduces
+    states to their sum, items of the same shape are summed at once, and ragged ones one by one.
+    """
+    if not reduces:
+        return np.stack(chunk)
+    try:
+        states = np.asarray(chunk)
+    except ValueError:
+        return np.array([np.sum(item) for item in chunk])
+    if states.dtype == object:
+        return np.array([np.sum(item) for item in chunk])
+    return states.reshape(len(chunk), -1).sum(axis=1)
+
+
+def _build_shard(
+    states: NDArray[np.int64],
+    expected_items: int,
+    false_positive_rate: float,
+    hash_function: HashFunctionName,
+) -> tuple[bytes, int]:
+    """
+    Worker of `Blossom.build_sharded`: return the serialized shard and its number of inserted items.
+    """
+    shard = Blossom(expected_items=expected_items, false_positive_rate=false_positive_rate, hash_function=hash_function)
+    shard.add_batch(states)
+    return bytes(shard.serialized()), shard.inserted_items
@@ -0,0 +1,133 @@
+import bisect
+import threading
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from warden_spex.cache import CacheStats, LRUCache
+
+S = TypeVar("S")
+
+# Task type and solver input, identifying a sequence of states.
+_Sequence = tuple[str, str]
+
+
+class StateCache:
+    """
+    Thread-safe cache of the states computed by tasks, keyed by task type, solver input and
+    state index, with LRU eviction bounded by number of states and by their total size.
+    Verifiers that opt in recompute each sampled state once, and can resume the computation
+    of a state from the nearest cached state preceding it (a checkpoint).
+    """
+
+    def __init__(self, max_entries: int = 100_000, max_size: int | None = None):
+        """
+        Create a cache holding at most `max_entries` states, whose sizes sum up to at most `max_size`
+        (unbounded if None).
+        """
+        self._cache: LRUCache[tuple[str, str, int], Any] = LRUCache(max_entries=max_entries, max_size=max_size)
+        # Sorted indexes of the cached states of each sequence, to find checkpoints. Indexes of
+        # evicted states are dropped lazily, when found missing from `_cache` or when they
+        # outnumber the cached states.
+        self._indexes: dict[_Sequence, list[int]] = {}
+        self._count_indexes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sequence(task: type, solver_input: BaseModel | None) -> _Sequence:
+        input_key = solver_input.model_dump_json() if solver_input is not None else ""
+        return f"{task.__module__}.{task.__qualname__}", input_key
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, task: type, solver_input: BaseModel | None, i: int) -> Any | None:
+        """
+        Return the `i`-th state of `task` with `solver_input`, or None if missing.
+        """
+        return self._cache.get((*self._sequence(task, solver_input), i))
+
+    def put(self, task: type, solver_input: BaseModel | None, i: int, state: Any, size: int = 1):
+        """
+        Insert the `i`-th `state` of `task` with `solver_input`, with `size`.
+        """
+        sequence = self._sequence(task, solver_input)
+        self._cache.put((*sequence, i), state, size=size)
+        with self._lock:
+            indexes = self._indexes.setdefault(sequence, [])
+            position = bisect.bisect_left(indexes, i)
+            if position == len(indexes) or indexes[position] != i:
+                indexes.insert(position, i)
+                self._count_indexes += 1
+            if self._count_indexes > 2 * self._cache.max_entries:
+                self._prune_indexes()
+
+    def _prune_indexes(self):
+        # Drop the indexes of evicted states, keeping memory proportional to the cached states.
+        for sequence, indexes in list(self._indexes.items()):
+            indexes[:] = [i for i in indexes if (*sequence, i) in self._cache]
+            if not indexes:
+                del self._indexes[sequence]
+        self._count_indexes = sum(len(indexes) for indexes in self._indexes.values())
+
+    def checkpoint(self, task: type, solver_input: BaseModel | None, i: int) -> tuple[int, Any] | None:
+        """
+        Return the index and state of the nearest cached state of `task` with `solver_input`
+        preceding the `i`-th one, or None if there is none.
+        """
+        sequence = self._sequence(task, solver_input)
+        with self._lock:
+            indexes = self._indexes.get(sequence, [])
+            position = bisect.bisect_left(indexes, i)
+            while position > 0:
+                j = indexes[position - 1]
+                state = self._cache.get((*sequence, j))
+                if state is not None:
+                    return j, state
+                del indexes[position - 1]
+                self._count_indexes -= 1
+                position -= 1
+        return None
+
+    def compute(
+        self,
+        task: type,
+        solver_input: BaseModel | None,
+        i: int,
+        compute_state: Callable[[int], S],
+        resume_state: Callable[[int, S, int], S] | None = None,
+    ) -> S:
+        """
+        Return the `i`-th state of `task` with `solver_input`, from the cache if present.
+        Otherwise, compute it with `compute_state(i)` or, if `resume_state` is provided and
+        a checkpoint `(j, state_j)` is cached, with `resume_state(j, state_j, i)`; then cache it.
+        """
+        state = self.get(task, solver_input, i)
+        if state is not None:
+            return state
+
+        checkpoint = self.checkpoint(task, solver_input, i) if resume_state is not None else None
+        if checkpoint is None or resume_state is None:
+            state = compute_state(i)
+        else:
+            j, state_j = checkpoint
+            state = resume_state(j, state_j, i)
+        self.put(task, solver_input, i, state)
+        return state
+
+    def clear(self):
+        """
+        Remove all states, keeping the statistics.
+        """
+        self._cache.clear()
+        with self._lock:
+            self._indexes.clear()
+            self._count_indexes = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Snapshot of hits, misses, evictions, number of states and total size.
+        """
+        return self._cache.stats
@@ -1,6 +1,6 @@
 import numpy as np
 
-from warden_spex.hashing.hash_array import check_validity, hash_array
+from warden_spex.hashing.hash_array import check_validity, check_validity_csr, hash_array, hash_array_csr, hash_array_grid
 
 
 def test_hash_array():
@@ -18,3 +18,54 @@ def test_hash_array():
 
     assert check_validity(h1, h2) is True
     assert check_validity(h1, h3) is False
+
+
+def test_hash_array_csr():
+    """
+    Test: The compact representation matches the set-based one, with the same validity checks.
+    """
+    rng = np.random.default_rng(0)
+    for epsilon in [0.0001, 0.003, 0.25]:
+        a1 = rng.normal(size=200)
+        a2 = a1 + rng.uniform(-epsilon, epsilon, size=200)
+        a3 = a1.copy()
+        a3[17] += 10
+
+        h1, h2, h3 = (hash_array(a, epsilon=epsilon) for a in (a1, a2, a3))
+        c1, c2, c3 = (hash_array_csr(a, epsilon=epsilon) for a in (a1, a2, a3))
+
+        assert c1.to_sets() == h1
+        assert check_validity_csr(c1, c2) is check_validity(h1, h2) is True
+        assert check_validity_csr(c1, c3) is check_validity(h1, h3) is False
+
+
+def test_hash_array_grid():
+    """
+    Test: Grid snapping yields a fixed number of hashes per element, shared by values within epsilon.
+    """
+    rng = np.random.default_rng(0)
+    for epsilon in [0.0001, 0.003, 0.25]:
+        for n_grids in [2, 3]:
+            a1 = rng.normal(size=200)
+            a2 = a1 + rng.uniform(-epsilon, epsilon, size=200)
+            a2[:2] = a1[:2] + [-epsilon, epsilon]
+            a3 = a1.copy()
+            a3[17] += n_grids / (n_grids - 1) * epsilon * 1.01
+
+            h1, h2, h3 = (hash_array_grid(a, epsilon=epsilon, n_grids=n_grids) for a in (a1, a2, a3))
+
+            assert len(h1) == 200 and len(h1.hashes) == 200 * n_grids
+            assert check_validity_csr(h1, h2) is True
+            assert check_validity_csr(h1, h3) is False
+            assert check_validity(h1.to_sets(), h2.to_sets()) is True
+            assert check_validity(h1.to_sets(), h3.to_sets()) is False
+
+
+def test_check_validity_csr_pairwise():
+    """
+    Test: The pairwise comparison of elements with the same number of hashes matches the general case.
+    """
+    a1 = np.array([0.5, 1.5, 2.5])
+    for a2 in [a1 + 0.00005, np.array([0.5, 1.6, 2.5])]:
+        h1, h2 = hash_array_grid(a1), hash_array_grid(a2)
+        assert check_validity_csr(h1, h2) is check_validity(h1.to_sets(), h2.to_sets())
@@ -1,6 +1,20 @@
 import numpy as np
+import pytest
 
-from warden_spex.hashing.hash_embedding import hash_embedding_m, jaccard_index
+from warden_spex.hashing.hash_embedding import (
+    embedding_comparisons_m,
+    hash_embedding_m,
+    hash_embedding_m_batch,
+    hash_embedding_simhash,
+    hash_embedding_simhash_batch,
+    jaccard_index,
+    jaccard_index_bands,
+    jaccard_index_many,
+    jaccard_index_one,
+    simhash_bands,
+    simhash_hyperplanes,
+    sketch_embedding_m,
+)
 
 # Using first 5 dimensions of "sentence-transformers/all-MiniLM-L6-v2" embeddings (huggingface).
 #
@@ -59,3 +73,82 @@ def test_hash_embedding():
     assert jaccard_index(h[0], h[1]) > jaccard_index(h[0], h[2])
     np.testing.assert_array_almost_equal(0.87, jaccard_index(h[0], h[1]), decimal=2)
     np.testing.assert_array_almost_equal(0.60, jaccard_index(h[0], h[2]), decimal=2)
+
+
+def test_hash_embedding_batch():
+    """
+    Test: Batched hashing of embeddings matches hashing them one by one.
+    """
+
+    assert hash_embedding_m_batch(X, V) == [hash_embedding_m(A, V) for A in X]
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(50, 16))
+    vantage_points = rng.normal(size=(12, 16))
+    assert hash_embedding_m_batch(embeddings, vantage_points) == [hash_embedding_m(A, vantage_points) for A in embeddings]
+    comparisons = embedding_comparisons_m(embeddings, vantage_points, batch_size=7)
+    assert comparisons.shape == (50, 66) and comparisons.dtype == np.bool_
+    sketch = sketch_embedding_m(embeddings, vantage_points, batch_size=7)
+    assert np.array_equal(sketch.bits, np.packbits(comparisons, axis=1))
+    assert sketch.to_sets() == hash_embedding_m_batch(embeddings, vantage_points)
+
+
+def test_sketch_embedding():
+    """
+    Test: Jaccard indexes computed on bitset sketches match those computed on sets.
+    """
+
+    sketch = sketch_embedding_m(X, V)
+    h = sketch.to_sets()
+    assert h == [hash_embedding_m(A, V) for A in X]
+
+    similarity = jaccard_index_many(sketch, sketch, batch_size=2)
+    expected = np.array([[jaccard_index(h[i], h[j]) for j in range(len(X))] for i in range(len(X))])
+    np.testing.assert_array_almost_equal(expected, similarity)
+    np.testing.assert_array_almost_equal(expected[0], jaccard_index_one(sketch_embedding_m(X[:1], V), sketch))
+
+
+def test_hash_embedding_simhash():
+    """
+    Test: SimHash bands rank the similarity of embeddings as SPEX-LSH-M does, with fewer hashes.
+    """
+
+    h = hash_embedding_simhash_batch(X)
+    assert h == [hash_embedding_simhash(A) for A in X]
+    assert all(len(hashes) == 32 for hashes in h)
+    assert jaccard_index(h[0], h[1]) > jaccard_index(h[0], h[2])
+
+    similarity = jaccard_index_bands(simhash_bands(X), simhash_bands(X), batch_size=2)
+    expected = np.array([[jaccard_index(h[i], h[j]) for j in range(len(X))] for i in range(len(X))])
+    np.testing.assert_array_almost_equal(expected, similarity)
+
+    sketch = sketch_embedding_m(X, V)
+    assert np.array_equal(np.argsort(similarity[0]), np.argsort(jaccard_index_many(sketch, sketch)[0]))
+
+    # Hyperplanes do not depend on the NumPy random generators.
+    assert simhash_hyperplanes(2, 4).tolist() == [[-1.0, 1.0, -1.0, 1.0], [-1.0, -1.0, 1.0, -1.0]]
+    assert not np.array_equal(simhash_bands(X, seed=1), simhash_bands(X))
+    for seed in (-1, 2**31):
+        with pytest.raises(ValueError):
+            simhash_bands(X, seed=seed)
+
+
+def test_hash_embedding_simhash_quality():
+    """
+    Test: SimHash similarities follow the cosine similarity of embeddings at least as closely as SPEX-LSH-M.
+    """
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(1, 64))
+    embeddings = base + rng.uniform(0, 2, size=(200, 1)) * rng.normal(size=(200, 64))
+    cosine = (embeddings @ base.T)[:, 0] / np.linalg.norm(embeddings, axis=1) / np.linalg.norm(base)
+
+    vantage_points = rng.normal(size=(10, 64))
+    similarity_m = jaccard_index_many(sketch_embedding_m(base, vantage_points), sketch_embedding_m(embeddings, vantage_points))[0]
+    similarity_simhash = jaccard_index_bands(simhash_bands(base), simhash_bands(embeddings))[0]
+
+    def rank_correlation(x, y):
+        return np.corrcoef(np.argsort(np.argsort(x)), np.argsort(np.argsort(y)))[0, 1]
+
+    assert rank_correlation(cosine, similarity_simhash) > 0.8
+    assert rank_correlation(cosine, similarity_simhash) >= rank_correlation(cosine, similarity_m)
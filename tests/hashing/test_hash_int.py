@@ -1,6 +1,6 @@
 import numpy as np
 
-from warden_spex.hashing.hash_int import hash_int
+from warden_spex.hashing.hash_int import INT_HASH_FUNCTIONS, hash_int, hash_int_batch, hash_int_digests, hash_tensor
 
 
 def test_hash_int():
@@ -10,3 +10,67 @@ def test_hash_int():
 
     h = hash_int(np.array([123], dtype=np.int64))
     assert h == 105266548169393929222442971458088679220
+
+
+def test_hash_int_batch():
+    """
+    Test: We can hash an array of int values at once, with the same results of `hash_int`.
+    """
+
+    values = np.array([123, 0, -1, 2**62, -(2**40)], dtype=np.int64)
+    assert hash_int_batch(values) == [hash_int(v) for v in values]
+    assert hash_int_batch(values)[0] == 105266548169393929222442971458088679220
+
+    # Multi-dimensional arrays are reduced to one hash per row.
+    rows = np.array([[120, 3], [-1, 0]], dtype=np.int64)
+    assert hash_int_batch(rows) == [hash_int(row) for row in rows]
+
+    assert hash_int_digests(values).shape == (5, 16)
+    assert not hash_int_batch(np.array([], dtype=np.int64))
+
+
+def test_hash_int_functions():
+    """
+    Test: The batch version of each hash function has the same results of its scalar version.
+    """
+
+    values = np.array([123, 0, -1, 2**62, 2**63 - 1, -(2**40)], dtype=np.int64)
+    rows = np.array([[120, 3], [-1, 0]], dtype=np.int64)
+    for name, hash_function in INT_HASH_FUNCTIONS.items():
+        assert hash_int_batch(values, name) == [hash_function.hash_int(v) for v in values]
+        assert hash_int_batch(rows, name) == [hash_function.hash_int(row) for row in rows]
+        assert all(-(2**127) <= h < 2**127 for h in hash_int_batch(values, name))
+
+    # Distinct hash functions, distinct hashes.
+    assert len({hash_int_batch(values[:1], name)[0] for name in INT_HASH_FUNCTIONS}) == len(INT_HASH_FUNCTIONS)
+
+
+def test_hash_tensor():
+    """
+    Test: We can hash tensors by their bytes, dtype and shape, in chunks.
+    """
+
+    a = np.random.default_rng(0).normal(size=(16, 1000))
+    h = hash_tensor(a)
+    assert -(2**127) <= h < 2**127
+    assert hash_tensor(a.copy()) == h
+    assert hash_tensor(np.asfortranarray(a)) == h
+
+    # Hashes depend on the chunk size.
+    assert hash_tensor(a, chunk_size=1000) == hash_tensor(a, chunk_size=1000)
+    assert hash_tensor(a, chunk_size=1000) != h
+
+    b = a.copy()
+    b[-1, -1] += 1e-9
+    assert hash_tensor(b) != h
+    assert hash_tensor(b, chunk_size=1000) != hash_tensor(a, chunk_size=1000)
+    assert hash_tensor(a.reshape(1000, 16)) != h
+    assert hash_tensor(a.astype(np.float32)) != hash_tensor(a)
+    assert hash_tensor(np.array([1, 2])) != hash_tensor(np.array([2, 1]))
+
+    # 0-d arrays and scalars have shape (), distinct from 1-element arrays.
+    assert hash_tensor(np.array(5)) == hash_tensor(np.int64(5))
+    assert hash_tensor(np.array(5)) != hash_tensor(np.array([5]))
+    # Rows of 1-D batches are scalars, hashed as such.
+    values = np.array([5, 7], dtype=np.int64)
+    assert hash_int_batch(values, "tensor") == [hash_tensor(np.int64(5)), hash_tensor(np.int64(7))]
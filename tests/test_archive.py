@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from warden_spex.archive import INDEX_FILE, ProofArchive
+from warden_spex.models import SolverProof
+from warden_spex.spex import Blossom, InvalidValueException, ScalableBlossom
+
+
+def test_proof_archive(tmp_path):
+    # Test: proofs are archived on disk, indexed by task and request id, and queried in place.
+
+    states = np.arange(1000, dtype=np.int64)
+    proofs = {}
+    for i, hash_function in enumerate(["sha256", "blake2b", "splitmix64"]):
+        blossom = Blossom(expected_items=1000, hash_function=hash_function)
+        blossom.add_items(states + i)
+        proofs[("task-a", f"request-{i}")] = SolverProof(bloomFilter=blossom.dump(), countItems=1000, hashFunction=hash_function)
+    scalable = ScalableBlossom(initial_items=100)
+    scalable.add_items(states)
+    proofs[("task-b", "request-0")] = SolverProof(bloomFilter=scalable.dump(), countItems=1000)
+
+    with ProofArchive(tmp_path) as archive:
+        for (task, request_id), proof in proofs.items():
+            archive.append(task, request_id, proof)
+        assert archive.load("task-a", "request-2").first_miss(states + 2) is None
+        with pytest.raises(InvalidValueException):
+            archive.append("task-a", "request-0", proofs[("task-a", "request-0")])
+
+    # A torn index entry, e.g. after a crash, is discarded on open.
+    with open(tmp_path / INDEX_FILE, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    with ProofArchive(tmp_path) as archive:
+        assert len(archive) == 4
+        assert ("task-b", "request-0") in archive
+        assert list(archive.keys("task-b")) == [("task-b", "request-0")]
+        for key, proof in proofs.items():
+            assert archive.proof(*key) == proof
+
+        loaded = archive.load("task-a", "request-1")
+        assert isinstance(loaded, Blossom)
+        assert loaded.hash_function == "blake2b"
+        assert loaded.first_miss(states + 1) is None
+        assert not loaded.is_hit_batch(states + 5000).all()
+
+        items = list(archive.items())
+        assert [(task, request_id) for task, request_id, _ in items] == list(proofs)
+        assert isinstance(items[-1][2], ScalableBlossom)
+        assert items[-1][2].is_hit_batch(states).all()
+        assert [request_id for _, request_id, _ in archive.items("task-a")] == ["request-0", "request-1", "request-2"]
+
+        archive.append("task-b", "request-1", proofs[("task-a", "request-0")])
+        assert archive.load("task-b", "request-1").first_miss(states) is None
+        with pytest.raises(KeyError):
+            archive.load("task-c", "request-0")
+
+    # Loaded filters stay valid after the archive is closed.
+    assert loaded.is_hit(states[0] + 1)
+
+
+def test_proof_archive_index(tmp_path, monkeypatch):
+    # Test: the compact index finds every proof across merges of appended entries, reopening, and hash collisions.
+
+    blossom = Blossom(expected_items=10)
+    blossom.add_items(np.arange(10, dtype=np.int64))
+    proof = SolverProof(bloomFilter=blossom.dump(), countItems=10)
+    keys = [(f"task-{i % 3}", f"request-{i}") for i in range(5000)]
+
+    with ProofArchive(tmp_path) as archive:
+        for task, request_id in keys:
+            archive.append(task, request_id, proof)
+        assert len(archive) == len(keys)
+        assert all(key in archive for key in keys[::97])
+        assert ("task-1", "request-0") not in archive
+
+    with ProofArchive(tmp_path) as archive:
+        assert len(archive) == len(keys)
+        assert all(key in archive for key in keys[::97])
+        assert archive.load(*keys[-1]).inserted_items == 10
+        assert list(archive.keys("task-2"))[:2] == [("task-2", "request-2"), ("task-2", "request-5")]
+
+    # Keys with the same hash are told apart by the keys in the index file.
+    monkeypatch.setattr("warden_spex.archive._key_hash", lambda key: 0)
+    with ProofArchive(tmp_path / "collisions") as archive:
+        for task, request_id in keys[:20]:
+            archive.append(task, request_id, proof)
+        assert all(key in archive for key in keys[:20])
+        assert ("task", "request-0") not in archive
+        with pytest.raises(InvalidValueException):
+            archive.append(*keys[3], proof)
+    with ProofArchive(tmp_path / "collisions") as archive:
+        assert all(key in archive for key in keys[:20])
+        assert archive.proof(*keys[7]) == proof
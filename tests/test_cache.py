@@ -0,0 +1,33 @@
+from warden_spex.cache import LRUCache
+
+
+def test_lru_cache():
+    # Test: entries are evicted by number and size, least recently used first.
+
+    cache = LRUCache(max_entries=3, max_size=10)
+    cache.put("a", 1, size=4)
+    cache.put("b", 2, size=4)
+    assert cache.get("a") == 1
+    cache.put("c", 3, size=4)
+
+    # "b" was the least recently used entry, evicted to fit the size budget.
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    cache.put("d", 4, size=1)
+    cache.put("e", 5, size=1)
+    assert len(cache) == 3
+    assert "a" not in cache
+
+    # Entries larger than the size budget are not cached.
+    cache.put("f", 6, size=11)
+    assert "f" not in cache
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 1, 2)
+    assert (stats.entries, stats.size) == (3, 6)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats.size == 0
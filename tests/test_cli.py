@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from test_spex import PrimeSumTask, SolverInputPrimeSum, SolverOutputPrimeSum, SolverRequestPrimeSum, VerifierRequestPrimeSum
+
+from warden_spex.cli import main, request_model
+from warden_spex.codec import write_jsonl
+from warden_spex.models import SolverProof, VerifierRequest, VerifierResponse
+from warden_spex.spex import InvalidValueException
+
+
+def test_cli_verify(tmp_path, capsys):
+    # Test: batch verification of a JSONL file, with ordered and unordered output.
+
+    requests = []
+    for n in (5, 10, 15, 20):
+        solver_request = SolverRequestPrimeSum(solverInput=SolverInputPrimeSum(no_of_primes=n))
+        solver_response = PrimeSumTask.solve(solver_request)
+        requests.append(
+            VerifierRequestPrimeSum(
+                solverRequest=solver_request,
+                solverOutput=solver_response.solverOutput,
+                solverProof=solver_response.solverProof,
+            )
+        )
+    # A forged proof, with the wrong number of items.
+    requests.append(requests[0].model_copy(update={"solverProof": SolverProof(countItems=3)}))
+
+    input_path = tmp_path / "requests.jsonl"
+    with open(input_path, "wb") as f:
+        write_jsonl(f, requests)
+
+    args = [
+        "test_spex:PrimeSumTask",
+        f"--input={input_path}",
+        "--request-model=test_spex.VerifierRequestPrimeSum",
+        "--workers=2",
+        "--max-pending=2",
+    ]
+    assert main([*args, f"--output={tmp_path / 'ordered.jsonl'}"]) == 1
+    ordered = [json.loads(line) for line in (tmp_path / "ordered.jsonl").read_text().splitlines()]
+    assert [r["isVerified"] for r in ordered] == [True, True, True, True, False]
+    assert "requests...........: 5" in capsys.readouterr().err
+
+    assert main([*args, f"--output={tmp_path / 'unordered.jsonl'}", "--unordered"]) == 1
+    unordered = [json.loads(line) for line in (tmp_path / "unordered.jsonl").read_text().splitlines()]
+    assert sorted((r["index"], r["response"]["isVerified"]) for r in unordered) == [(0, True), (1, True), (2, True), (3, True), (4, False)]
+
+    # Without an explicit request model, it is taken from the annotations of the task.
+    assert request_model(PrimeSumTask) is VerifierRequestPrimeSum
+    with open(input_path, "ab") as f:
+        f.write(b'{"solverProof": "invalid"}\n')
+    assert main(args[:1] + [f"--input={input_path}", f"--output={tmp_path / 'default.jsonl'}", "--workers=1"]) == 1
+    default = [json.loads(line) for line in (tmp_path / "default.jsonl").read_text().splitlines()]
+    assert [r["isVerified"] for r in default] == [True, True, True, True, False, False]
+    assert default[5]["evidence"].startswith("Invalid request: Invalid JSONL line 6")
+
+
+def test_cli_generic_request_model():
+    # Test: parametrized generic request models are rejected, as they can't be sent to worker processes.
+
+    class GenericTask(PrimeSumTask):
+        @staticmethod
+        def verify(request: VerifierRequest[SolverOutputPrimeSum]) -> VerifierResponse:  # type: ignore[override]
+            return PrimeSumTask.verify(request)  # type: ignore[arg-type]
+
+    with pytest.raises(InvalidValueException, match="--request-model"):
+        request_model(GenericTask)
@@ -20,4 +20,4 @@ def test_ruff(check_run):
 
 def test_pylint(check_run):
     """Test: lint with Pylint."""
-    check_run("pylint", project_dir / "src", project_dir / "utils", project_dir / "tests")
+    check_run("pylint", project_dir / "src", project_dir / "utils", project_dir / "tests", project_dir / "benchmarks")
@@ -0,0 +1,48 @@
+import io
+
+import pytest
+from test_spex import PrimeSumTask, SolverInputPrimeSum, SolverRequestPrimeSum, VerifierRequestPrimeSum
+
+from warden_spex.codec import read_jsonl, write_jsonl
+from warden_spex.models import VerifierResponse
+from warden_spex.spex import InvalidValueException
+
+
+def test_jsonl_codec():
+    # Test: requests and responses round-trip through JSONL, read lazily one line at a time.
+
+    solver_request = SolverRequestPrimeSum(solverInput=SolverInputPrimeSum(no_of_primes=20))
+    solver_response = PrimeSumTask.solve(solver_request)
+    requests = [
+        VerifierRequestPrimeSum(
+            solverRequest=solver_request,
+            solverOutput=solver_response.solverOutput,
+            solverProof=solver_response.solverProof,
+            verificationRatio=i / 10,
+        )
+        for i in range(10)
+    ]
+
+    stream = io.BytesIO()
+    assert write_jsonl(stream, requests) == 10
+    assert write_jsonl(stream, [VerifierResponse(isVerified=True)]) == 1
+    lines = stream.getvalue().splitlines(keepends=True)
+    assert len(lines) == 11
+
+    consumed: list[bytes] = []
+    lines_iterator = (consumed.append(line) or line for line in lines[:10])
+    loaded = read_jsonl(lines_iterator, VerifierRequestPrimeSum)
+    assert next(loaded) == requests[0]
+    assert len(consumed) == 1
+    assert list(loaded) == requests[1:]
+
+    # Loaded requests keep the task-specific inputs, and can be verified.
+    assert PrimeSumTask.verify(next(read_jsonl([lines[5]], VerifierRequestPrimeSum))).isVerified
+
+    assert list(read_jsonl(io.BytesIO(lines[10] + b"\n"), VerifierResponse)) == [VerifierResponse(isVerified=True)]
+
+    # Invalid lines are reported with their line number, and types are coerced.
+    with pytest.raises(InvalidValueException, match="line 2"):
+        list(read_jsonl([lines[10], b'{"isVerified": "maybe"}'], VerifierResponse))
+    coercible = b'{"countItems": "5"}'
+    assert next(read_jsonl([coercible], VerifierResponse)).countItems == 5
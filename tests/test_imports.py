@@ -0,0 +1,75 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from warden_spex.spex import Blossom
+
+# Budgets for the cold import of modules used by short-lived workers and CLI invocations,
+# as wall time (best of a few runs, to absorb noise) and peak memory allocated by Python.
+IMPORT_BUDGETS = {
+    "warden_spex.models": (0.5, 16_000_000),
+    "warden_spex.spex": (1.0, 32_000_000),
+}
+
+# Modules loaded lazily, that importing a module must not load.
+LAZY_MODULES = {
+    "warden_spex.models": ["numpy", "rbloom", "asyncio", "warden_spex.hashing.hash_int"],
+    "warden_spex.spex": ["rbloom", "asyncio", "concurrent.futures.process"],
+}
+
+
+def _run(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], text=True, capture_output=True, check=True).stdout
+
+
+def import_seconds(module: str, runs: int = 3) -> float:
+    """
+    Return the best wall time of importing `module` in a fresh interpreter.
+    """
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    return min(float(_run(code)) for _ in range(runs))
+
+
+def import_peak_memory(module: str) -> int:
+    """
+    Return the peak memory allocated by Python while importing `module` in a fresh interpreter.
+    """
+    code = f"import tracemalloc; tracemalloc.start(); import {module}; print(tracemalloc.get_traced_memory()[1])"
+    return int(_run(code))
+
+
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS))
+def test_import_budget(module: str):
+    """
+    Test: Importing the core modules stays within the time and memory budgets, without loading lazy modules.
+    """
+    max_seconds, max_memory = IMPORT_BUDGETS[module]
+    assert import_seconds(module) < max_seconds
+    assert import_peak_memory(module) < max_memory
+
+    loaded = _run(f"import sys; import {module}; print(' '.join(sys.modules))").split()
+    assert not set(LAZY_MODULES[module]) & set(loaded)
+
+
+def test_lazy_rbloom():
+    """
+    Test: Verifiers querying a proof never import rbloom, solvers building one do.
+    """
+    blossom = Blossom(expected_items=10)
+    blossom.add_batch(np.arange(10))
+    _run(
+        f"""
+import sys
+import numpy as np
+from warden_spex.models import SolverProof
+from warden_spex.spex import Blossom
+
+proof = Blossom.load(SolverProof(bloomFilter={blossom.dump()!r}, countItems=10))
+assert proof.is_hit_batch(np.arange(10)).all()
+assert "rbloom" not in sys.modules
+Blossom(expected_items=10).add_batch(np.arange(10))
+assert "rbloom" in sys.modules
+"""
+    )
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from test_spex import PrimeSumTask, SolverInputPrimeSum
+
+from warden_spex.instrumentation import MetricsRecorder, increment, instrumented, is_enabled, sink_context, span
+from warden_spex.models import SolverRequest
+from warden_spex.spex import Blossom
+
+
+def test_instrumentation_sinks():
+    # Test: spans and counters reach the registered sink only while it is registered.
+
+    @instrumented("failing")
+    def failing():
+        raise ValueError()
+
+    recorder = MetricsRecorder()
+    with sink_context(recorder):
+        assert is_enabled()
+        with span("block"):
+            increment("items", 3)
+        with pytest.raises(ValueError):
+            failing()
+    assert not is_enabled()
+
+    increment("items", 5)
+    assert recorder.counters == {"items": 3}
+    assert recorder.spans["block"].calls == 1
+    assert recorder.spans["failing"].failures == 1
+
+
+def test_instrumentation_blossom_and_task():
+    # Test: Blossom methods and task solve/verify are reported as spans, with item counters.
+
+    recorder = MetricsRecorder()
+    with sink_context(recorder):
+        blossom = Blossom(expected_items=100)
+        blossom.add_batch(np.arange(10))
+        assert blossom.is_hit_batch(np.arange(10)).all()
+        PrimeSumTask.solve(SolverRequest(solverInput=SolverInputPrimeSum(no_of_primes=5)))
+
+    assert recorder.counters["blossom.items_added"] >= 10
+    assert recorder.counters["blossom.lookups"] == 10
+    assert recorder.spans["blossom.add_batch"].calls >= 1
+    assert recorder.spans["PrimeSumTask.solve"].calls == 1
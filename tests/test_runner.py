@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from test_spex import PrimeSumTask
+
+from warden_spex.runner import VerificationRunner
+from warden_spex.spex import Blossom
+
+
+def test_verification_runner():
+    # Test: sampled states are re-executed in parallel, stopping at the first miss.
+
+    primes = [PrimeSumTask.ith_prime(i) for i in range(1, 101)]
+    blossom = Blossom(expected_items=len(primes), false_positive_rate=0.0001)
+    blossom.add_items(np.array(primes))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        runner = VerificationRunner(executor=executor, max_pending=8)
+
+        response = runner.run(blossom, range(1, 101), PrimeSumTask.ith_prime)
+        assert response.isVerified is True
+        assert response.countItems == 100
+
+        # Sample 150 was never inserted: its prime is a miss.
+        response = runner.run(blossom, [5, 150, *range(1, 101)], PrimeSumTask.ith_prime, evidence="Missing prime i={}")
+        assert response.isVerified is False
+        assert response.evidence == "Missing prime i=150"
+        assert 1 <= response.countItems <= 102
+
+
+def test_verification_runner_processes():
+    # Test: the default runner re-executes sampled states in worker processes.
+
+    primes = [PrimeSumTask.ith_prime(i) for i in range(1, 21)]
+    blossom = Blossom(expected_items=len(primes), false_positive_rate=0.0001)
+    blossom.add_items(np.array(primes))
+
+    with VerificationRunner() as runner:
+        response = runner.run(blossom, range(1, 21), PrimeSumTask.ith_prime)
+    assert response.isVerified is True
+    assert response.countItems == 20
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from test_spex import PrimeSumTask, prime_sum_verifier_request
+
+from warden_spex.models import SolverProof, VerifierRequest
+from warden_spex.sampling import SequentialTest, count_samples, min_samples
+from warden_spex.spex import InvalidValueException
+
+
+def test_min_samples():
+    # Test: the number of samples depends on confidence, skip fraction and false positive rate, not on the proof size.
+
+    n = min_samples(confidence=0.99, skip_fraction=0.01, false_positive_rate=0.01)
+    assert n == 463
+    assert (1 - 0.01 * 0.99) ** n <= 0.01 < (1 - 0.01 * 0.99) ** (n - 1)
+    assert min_samples(confidence=0.99, skip_fraction=0.1, false_positive_rate=0.01) < n
+    assert min_samples(confidence=0.999, skip_fraction=0.01, false_positive_rate=0.01) > n
+    assert min_samples(confidence=0.99, skip_fraction=0.01, false_positive_rate=0.01, count_items=100) == 100
+
+    with pytest.raises(InvalidValueException):
+        min_samples(confidence=1, skip_fraction=0.01, false_positive_rate=0.01)
+    with pytest.raises(InvalidValueException):
+        min_samples(confidence=0.99, skip_fraction=0.01, false_positive_rate=1)
+
+
+def test_count_samples():
+    # Test: a verifier request carries either a ratio or a target confidence.
+
+    proof = SolverProof(countItems=10**9)
+    assert count_samples(VerifierRequest(solverProof=proof, verificationRatio=0.1), 0.01) == 10**8
+    request = VerifierRequest(solverProof=proof, verificationConfidence=0.99, lazySkipFraction=0.01)
+    assert count_samples(request, 0.01) == 463
+
+    # End-to-end, with the PrimeSum verifier.
+    verifier_request = prime_sum_verifier_request(500, verificationConfidence=0.99, lazySkipFraction=0.05)
+    verifier_response = PrimeSumTask.verify(verifier_request)
+    assert verifier_response.isVerified
+    assert verifier_response.countItems < 100
+
+
+def test_sequential_test():
+    # Test: the sequential test stops as soon as the outcomes are conclusive.
+
+    rng = np.random.default_rng(0)
+    n = min_samples(confidence=0.99, skip_fraction=0.01, false_positive_rate=0.01)
+
+    # Without tolerated misses, it accepts after `min_samples` hits, and rejects at the first miss.
+    test = SequentialTest(confidence=0.99, skip_fraction=0.01, false_positive_rate=0.01)
+    assert test.run(iter([True] * 10000)) == "accept"
+    assert test.n_samples == n
+    test = SequentialTest(confidence=0.99, skip_fraction=0.01, false_positive_rate=0.01)
+    assert test.run([True, True, False, True]) == "reject"
+    assert test.n_samples == 3
+
+    # With tolerated misses, honest solvers are accepted and lazy ones rejected.
+    for miss_rate, verdict in ((0.001, "accept"), (0.1, "reject")):
+        test = SequentialTest(confidence=0.99, skip_fraction=0.1, false_positive_rate=0.01, miss_rate=0.001)
+        assert test.run(rng.random(100000) >= miss_rate) == verdict
+        assert test.n_samples < 10000
@@ -0,0 +1,68 @@
+import asyncio
+import base64
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from test_spex import PrimeSumTask, SolverInputPrimeSum, prime_sum_verifier_request
+
+from warden_spex.models import SolverProof, SolverRequest, VerifierRequest
+from warden_spex.service import VerificationService
+
+
+def test_verification_service(monkeypatch):
+    # Test: a batch of requests is verified concurrently, decoding each distinct proof once.
+
+    requests = []
+    for no_of_primes in [10, 20, 10, 20, 10]:
+        solver_request = SolverRequest(solverInput=SolverInputPrimeSum(no_of_primes=no_of_primes), falsePositiveRate=0.01)
+        solver_response = PrimeSumTask.solve(solver_request)
+        requests.append(
+            VerifierRequest(
+                solverRequest=solver_request,
+                solverOutput=solver_response.solverOutput,
+                solverProof=solver_response.solverProof,
+                verificationRatio=0.5,
+            )
+        )
+
+    count_decodings = 0
+    b64decode = base64.b64decode
+
+    def counting_b64decode(*args, **kwargs):
+        nonlocal count_decodings
+        count_decodings += 1
+        return b64decode(*args, **kwargs)
+
+    monkeypatch.setattr(base64, "b64decode", counting_b64decode)
+
+    async def verify_all():
+        service = VerificationService(PrimeSumTask(), max_concurrency=2)
+        return [item async for item in service.verify_many(requests)]
+
+    responses = asyncio.run(verify_all())
+
+    assert sorted(i for i, _ in responses) == list(range(len(requests)))
+    assert all(response.isVerified for _, response in responses)
+    assert count_decodings == 2
+
+    # A malformed proof fails its own verification only.
+    requests.append(requests[0].model_copy(update={"solverProof": SolverProof(bloomFilter=b"abc")}))
+    responses = dict(asyncio.run(verify_all()))
+
+    assert sorted(responses) == list(range(len(requests)))
+    assert [responses[i].isVerified for i in range(len(requests))] == [True] * 5 + [False]
+
+
+def test_verification_service_executor():
+    # Test: CPU-bound verifications run on a given executor, a thread pool sharing decoded proofs or a process pool.
+
+    requests = [prime_sum_verifier_request(no_of_primes) for no_of_primes in [10, 20, 10]]
+    requests.append(requests[0].model_copy(update={"solverProof": SolverProof(bloomFilter=b"abc")}))
+
+    async def verify_all(executor):
+        service = VerificationService(PrimeSumTask(), max_concurrency=2, executor=executor)
+        return {i: response async for i, response in service.verify_many(requests)}
+
+    for executor in (ThreadPoolExecutor(max_workers=2), ProcessPoolExecutor(max_workers=2)):
+        with executor:
+            responses = asyncio.run(verify_all(executor))
+        assert [responses[i].isVerified for i in range(len(requests))] == [True, True, True, False]
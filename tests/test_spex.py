@@ -1,10 +1,15 @@
+import base64
 import random
+import struct
 
 import numpy as np
+import pytest
 from pydantic import BaseModel, PositiveInt
 
+from warden_spex.cache import LRUCache
 from warden_spex.models import SolverProof, SolverRequest, SolverResponse, Task, VerifierRequest, VerifierResponse
-from warden_spex.spex import Blossom
+from warden_spex.sampling import count_samples
+from warden_spex.spex import Blossom, InvalidValueException, ScalableBlossom
 
 
 class SolverInputPrimeSum(BaseModel):
@@ -23,18 +28,22 @@ class SolverResponsePrimeSum(SolverResponse[SolverOutputPrimeSum]):
     solverOutput: SolverOutputPrimeSum = SolverOutputPrimeSum()
 
 
+class VerifierRequestPrimeSum(VerifierRequest[SolverOutputPrimeSum]):
+    solverRequest: SolverRequestPrimeSum = SolverRequestPrimeSum()
+
+
 class PrimeSumTask(Task[SolverInputPrimeSum, SolverOutputPrimeSum]):
     """
     Implementation of PrimeSum Task (lazy verifier).
     """
 
     @staticmethod
-    def ith_prime(i: PositiveInt) -> PositiveInt:
+    def ith_prime(i: PositiveInt, j: int = 0, jth_prime: PositiveInt = 1) -> PositiveInt:
         """
-        Given `i` >= 1 , return the i-th prime.
+        Given `i` >= 1 , return the i-th prime, resuming from the `j`-th prime `jth_prime` (j < i) if provided.
         """
-        assert i >= 1
-        count, num = 0, 1
+        assert i > j >= 0
+        count, num = j, jth_prime
         while count < i:
             num += 1
             for d in range(2, int(num**0.5) + 1):
@@ -44,6 +53,13 @@ class PrimeSumTask(Task[SolverInputPrimeSum, SolverOutputPrimeSum]):
                 count += 1
         return num
 
+    @staticmethod
+    def resume_ith_prime(j: int, jth_prime: PositiveInt, i: PositiveInt) -> PositiveInt:
+        """
+        Given the `j`-th prime `jth_prime`, return the i-th prime.
+        """
+        return PrimeSumTask.ith_prime(i, j, jth_prime)
+
     @staticmethod
     def solve(request: SolverRequest[SolverInputPrimeSum]) -> SolverResponsePrimeSum:
         """
@@ -61,17 +77,16 @@ class PrimeSumTask(Task[SolverInputPrimeSum, SolverOutputPrimeSum]):
         # Creating the Bloom filter by inserting all primes
         n_items = len(primes)
         blossom = Blossom(expected_items=n_items, false_positive_rate=request.falsePositiveRate)
-        for prime in primes:
-            blossom.add(np.array(prime))
+        blossom.add_items(np.array(primes))
 
         # Assembling the response
         return SolverResponsePrimeSum(
             solverOutput=SolverOutputPrimeSum(sum_of_primes=sum_of_primes),
-            solverProof=SolverProof(countItems=blossom.inserted_items, bloomFilter=blossom.dump()),
+            solverProof=SolverProof(countItems=blossom.inserted_items, bloomFilter=blossom.dump(), hashFunction=blossom.hash_function),
         )
 
     @staticmethod
-    def verify(request: VerifierRequest[SolverInputPrimeSum]) -> VerifierResponse:
+    def verify(request: VerifierRequestPrimeSum) -> VerifierResponse:  # type: ignore[override]
         """
         PrimeSum-verifier-L: Verifier for lazy solvers.
         """
@@ -89,15 +104,28 @@ class PrimeSumTask(Task[SolverInputPrimeSum, SolverOutputPrimeSum]):
             return VerifierResponse(isVerified=False, evidence="Failed expected insertions in Bloom filter")
 
         # Verify random sample of items
-        count_samples = int(np.ceil(request.solverProof.countItems * request.verificationRatio))
-        primes_i = random.sample(list(range(1, request.solverRequest.solverInput.no_of_primes + 1)), count_samples)
-        count_lookups = 0
-        for i in primes_i:
-            count_lookups += 1
-            if not blossom.is_hit(np.array(PrimeSumTask.ith_prime(i))):
-                return VerifierResponse(countItems=count_lookups, isVerified=False, evidence=f"Missing prime i={i}")
+        samples = count_samples(request, blossom.estimate_false_positive_rate())
+        primes_i = random.sample(list(range(1, request.solverRequest.solverInput.no_of_primes + 1)), samples)
+        primes = [PrimeSumTask.cached_state(None, i, PrimeSumTask.ith_prime, PrimeSumTask.resume_ith_prime) for i in primes_i]
+        miss = blossom.first_miss(np.array(primes, dtype=np.int64))
+        if miss is not None:
+            return VerifierResponse(countItems=miss + 1, isVerified=False, evidence=f"Missing prime i={primes_i[miss]}")
 
-        return VerifierResponse(countItems=count_lookups, isVerified=True)
+        return VerifierResponse(countItems=len(primes_i), isVerified=True)
+
+
+def prime_sum_verifier_request(no_of_primes: int, **kwargs) -> VerifierRequestPrimeSum:
+    """
+    Solve PrimeSum for `no_of_primes`, and return the verifier request of the solution, with fields `kwargs`.
+    """
+    solver_request = SolverRequestPrimeSum(solverInput=SolverInputPrimeSum(no_of_primes=no_of_primes))
+    solver_response = PrimeSumTask.solve(solver_request)
+    return VerifierRequestPrimeSum(
+        solverRequest=solver_request,
+        solverOutput=solver_response.solverOutput,
+        solverProof=solver_response.solverProof,
+        **kwargs,
+    )
 
 
 def test_spex():
@@ -135,3 +163,315 @@ def test_spex():
 
     assert verify_request.countItems == 3
     assert verify_request.isVerified is True
+
+
+def test_blossom_add_items():
+    # Test: bulk insertion produces the same proof as inserting items one by one.
+
+    states = np.arange(-500, 1500, 3, dtype=np.int64)
+
+    serial = Blossom(expected_items=len(states))
+    for state in states:
+        serial.add(state)
+
+    bulk = Blossom(expected_items=len(states))
+    assert bulk.add_items(states[:100]) == 100
+    assert bulk.add_items(iter(states[100:]), batch_size=64) == len(states) - 100
+    assert bulk.inserted_items == serial.inserted_items
+    assert bulk.dump() == serial.dump()
+    assert all(bulk.is_hit(state) for state in states)
+
+    with pytest.raises(InvalidValueException):
+        bulk.add_items(np.array([1]))
+
+
+def test_blossom_add_batch_in_place(monkeypatch):
+    # Test: repeated batches, single items and merges update the same buffer in place, without rbloom.
+
+    states = np.arange(0, 20000, dtype=np.int64) * 7
+    blossom, other = Blossom(expected_items=30000), Blossom(expected_items=30000)
+    blossom.add_batch(states[:100])
+    other.add_batch(states[-100:])
+    buffer = blossom.serialized().obj
+
+    # rbloom is only needed to size a new filter, or to hand out a copy through `bloom`.
+    monkeypatch.setattr("warden_spex.spex._bloom_type", None)
+    for start in range(100, len(states) - 100, 100):
+        blossom.add_batch(states[start : start + 100])
+    blossom.add(np.int64(-1))
+    blossom.merge(other)
+    assert blossom.serialized().obj is buffer
+    assert blossom.inserted_items == len(states) + 1
+    monkeypatch.undo()
+
+    reference = Blossom(expected_items=30000)
+    reference.add_items(states)
+    reference.add(np.int64(-1))
+    assert blossom.dump() == reference.dump()
+    assert all(state in blossom.bloom for state in states[::1000])
+
+
+def test_blossom_invalid_parameters():
+    """
+    Test: Invalid filter parameters are rejected on creation, before the rbloom filter is built.
+    """
+    for expected_items, false_positive_rate in [(0, 0.01), (10, 0.0), (10, 1.0)]:
+        with pytest.raises(InvalidValueException):
+            Blossom(expected_items=expected_items, false_positive_rate=false_positive_rate)
+
+
+def test_blossom_is_hit_batch(monkeypatch):
+    # Test: batch lookups agree with single lookups, and report the first miss.
+
+    states = np.arange(0, 2000, 7, dtype=np.int64)
+    blossom = Blossom(expected_items=len(states), false_positive_rate=0.001)
+    blossom.add_items(states)
+
+    # Lookups read the filter bits in place, without going through rbloom.
+    monkeypatch.setattr("warden_spex.spex._bloom_type", None)
+    candidates = np.concatenate([states, np.arange(10**9, 10**9 + 1000, dtype=np.int64)])
+    mask = blossom.is_hit_batch(candidates)
+    assert mask.tolist() == [blossom.is_hit(state) for state in candidates]
+    assert mask[: len(states)].all()
+    # Small batches take the scalar path, with the same outcome.
+    assert blossom.is_hit_batch(candidates[-10:]).tolist() == mask[-10:].tolist()
+
+    assert blossom.first_miss(states) is None
+    first_miss = blossom.first_miss(candidates, batch_size=100)
+    assert first_miss is not None
+    assert first_miss >= len(states)
+    assert first_miss == np.flatnonzero(~mask)[0]
+
+
+def test_blossom_false_positive_rate():
+    # Test: analytic and Monte Carlo estimates agree, and forged item counts are detected.
+
+    states = np.arange(5000, dtype=np.int64)
+    blossom = Blossom(expected_items=len(states), false_positive_rate=0.01)
+    blossom.add_items(states)
+
+    analytic = blossom.estimate_false_positive_rate()
+    montecarlo = blossom.estimate_false_positive_rate(method="montecarlo", n_probes=200000, seed=0)
+    np.testing.assert_allclose(analytic, 0.01, atol=0.002)
+    np.testing.assert_allclose(montecarlo, analytic, atol=0.002)
+
+    estimated_items, std_items = blossom.estimate_inserted_items()
+    assert abs(estimated_items - len(states)) < 4 * std_items
+    assert blossom.verify_false_positive_rate(expected_rate=0.01, count_tolerance=4.0) is True
+
+    forged = Blossom.load(SolverProof(bloomFilter=blossom.dump(), countItems=len(states) // 2))
+    assert forged.verify_false_positive_rate(expected_rate=0.01) is True
+    assert forged.verify_false_positive_rate(expected_rate=0.01, count_tolerance=4.0) is False
+
+    # Repeated states are accepted, unless the count check (which assumes distinct states) is requested.
+    repeated = Blossom(expected_items=1000, false_positive_rate=0.01)
+    repeated.add_items(np.arange(1000, dtype=np.int64) % 600)
+    assert repeated.verify_false_positive_rate(expected_rate=0.01) is True
+    assert repeated.verify_false_positive_rate(expected_rate=0.01, count_tolerance=4.0) is False
+
+
+def test_blossom_build_sharded():
+    # Test: a proof built from parallel shards is identical to one built serially.
+
+    states = np.arange(10000, dtype=np.int64) * 31
+    serial = Blossom(expected_items=len(states))
+    serial.add_items(states)
+
+    sharded = Blossom.build_sharded(states, expected_items=len(states), n_shards=3)
+    assert sharded.inserted_items == serial.inserted_items
+    assert sharded.dump() == serial.dump()
+
+    loaded = Blossom.load(SolverProof(bloomFilter=sharded.dump(), countItems=sharded.inserted_items))
+    assert loaded.first_miss(states) is None
+
+    with pytest.raises(InvalidValueException):
+        sharded.merge(Blossom(expected_items=10))
+
+
+def test_blossom_binary_proof():
+    # Test: the binary proof encoding round-trips, with and without compression.
+
+    states = np.arange(0, 300, dtype=np.int64)
+    blossom = Blossom(expected_items=100000)
+    blossom.add_items(states)
+
+    raw = blossom.dump_binary()
+    compressed = blossom.dump_binary(compress=True)
+    assert len(raw) < len(blossom.dump())
+    assert len(compressed) < len(raw) // 4
+
+    for data in (raw, memoryview(compressed)):
+        loaded = Blossom.load_binary(data)
+        assert loaded.inserted_items == len(states)
+        assert loaded.dump() == blossom.dump()
+        assert loaded.first_miss(states) is None
+        assert all(loaded.is_hit(state) for state in states[:10])
+
+        # Mutations copy the filter once, leaving `data` untouched.
+        loaded.add(np.int64(-1))
+        assert loaded.is_hit(np.int64(-1))
+    assert Blossom.load_binary(raw).dump_binary() == raw == blossom.dump_binary()
+
+    with pytest.raises(InvalidValueException):
+        Blossom.load_binary(b"XXXX" + raw[4:])
+    with pytest.raises(InvalidValueException):
+        Blossom.load_binary(raw[:-1])
+
+
+@pytest.mark.parametrize("hash_function", ["sha256", "blake2b", "splitmix64", "tensor"])
+def test_blossom_hash_functions(hash_function):
+    # Test: the hash function is selectable, and recorded in proofs and binary encodings.
+
+    states = np.arange(0, 1000, dtype=np.int64) * 3
+    blossom = Blossom(expected_items=2000, hash_function=hash_function)
+    blossom.add_items(states[:500])
+    for state in states[500:]:
+        blossom.add(state)
+    assert blossom.first_miss(states) is None
+
+    proof = SolverProof(bloomFilter=blossom.dump(), countItems=blossom.inserted_items, hashFunction=blossom.hash_function)
+    for loaded in (Blossom.load(proof), Blossom.load_binary(blossom.dump_binary())):
+        assert loaded.hash_function == hash_function
+        assert all(loaded.is_hit(state) for state in states[::50])
+        assert loaded.is_hit_batch(states).all()
+        assert loaded.verify_false_positive_rate()
+
+    sharded = Blossom.build_sharded(states, expected_items=2000, n_shards=2, hash_function=hash_function)
+    assert sharded.dump() == blossom.dump()
+
+    # Filters with different hash functions can't be merged.
+    other = "blake2b" if hash_function == "sha256" else "sha256"
+    with pytest.raises(InvalidValueException):
+        blossom.merge(Blossom(expected_items=2000, hash_function=other))
+
+
+def test_blossom_tensor_states():
+    # Test: with the tensor hash function, array states are not reduced to their sum.
+
+    rng = np.random.default_rng(0)
+    tensors = [rng.normal(size=(8, 16)).astype(np.float32) for _ in range(50)]
+    blossom = Blossom(expected_items=100, hash_function="tensor")
+    blossom.add_items(iter(tensors[:40]), batch_size=16)
+    blossom.add(tensors[40])
+    assert blossom.first_miss(np.stack(tensors[:41])) is None
+    assert all(blossom.is_hit(tensor) for tensor in tensors[:41])
+    assert not blossom.is_hit(tensors[0][::-1])
+
+    sha256 = Blossom(expected_items=100)
+    sha256.add(np.array([1, 2]))
+    assert sha256.is_hit(np.array([2, 1]))
+    tensor = Blossom(expected_items=100, hash_function="tensor")
+    tensor.add(np.array([1, 2]))
+    assert not tensor.is_hit(np.array([2, 1]))
+
+
+def test_blossom_hash_function_compatibility():
+    # Test: proofs and binary encodings without a hash function default to SHA-256.
+
+    blossom = Blossom(expected_items=100)
+    blossom.add_items(np.arange(100, dtype=np.int64))
+    assert SolverProof(bloomFilter=blossom.dump(), countItems=100).hashFunction == "sha256"
+
+    # Version 1 binary header, without the hash function code.
+    data = blossom.dump_binary()
+    data_v1 = data[:4] + b"\x01" + data[5:6] + data[7:]
+    assert Blossom.load_binary(data_v1).first_miss(np.arange(100, dtype=np.int64)) is None
+
+    with pytest.raises(InvalidValueException):
+        Blossom(hash_function="md5")  # type: ignore[arg-type]
+    with pytest.raises(InvalidValueException):
+        Blossom.load_binary(data[:6] + b"\xff" + data[7:])
+
+
+def test_scalable_blossom():
+    # Test: a scalable Bloom filter grows with the inserted states, keeping the overall false positive rate.
+
+    states = np.arange(20000, dtype=np.int64) * 7
+    scalable = ScalableBlossom(initial_items=1000, false_positive_rate=0.01)
+    for state in states[:10]:
+        scalable.add(state)
+    assert scalable.add_items(states[10:5000]) == 4990
+    assert scalable.add_items(iter(states[5000:]), batch_size=3000) == 15000
+
+    assert scalable.inserted_items == len(states)
+    assert len(scalable.filters) == 5
+    assert scalable.first_miss(states) is None
+    assert scalable.estimate_false_positive_rate() <= 0.01
+    assert scalable.verify_false_positive_rate(expected_rate=0.01, tolerance=0, count_tolerance=4.0)
+
+    loaded = Blossom.load(SolverProof(bloomFilter=scalable.dump(), countItems=scalable.inserted_items))
+    assert isinstance(loaded, ScalableBlossom)
+    assert loaded.is_hit(states[-1])
+    assert loaded.is_hit_batch(states).all()
+    np.testing.assert_allclose(loaded.estimate_false_positive_rate(), scalable.estimate_false_positive_rate())
+    assert loaded.verify_false_positive_rate(expected_rate=0.01, tolerance=0)
+
+    with pytest.raises(InvalidValueException):
+        Blossom.load(SolverProof(bloomFilter=scalable.dump(), countItems=1))
+
+    loaded.freeze()
+    with pytest.raises(InvalidValueException):
+        loaded.add_items(states + 1)
+    with pytest.raises(InvalidValueException):
+        loaded.filters[0].add(np.int64(1))
+    assert loaded.inserted_items == len(states)
+
+
+def test_scalable_blossom_serialization():
+    # Test: loaded scalable Bloom filters keep growing with their own parameters, legacy ones are read-only.
+
+    states = np.arange(1000, dtype=np.int64) * 7
+    scalable = ScalableBlossom(initial_items=100, false_positive_rate=0.001, growth=3, tightening=0.8)
+    scalable.add_items(states[:150])
+    data = base64.b64decode(scalable.dump())
+
+    loaded = ScalableBlossom.from_serialized(data)
+    assert (loaded.initial_items, loaded.false_positive_rate, loaded.growth, loaded.tightening) == (100, 0.001, 3, 0.8)
+    assert [blossom.expected_items for blossom in loaded.filters] == [100, 300]
+    loaded.add_items(states[150:])
+    scalable.add_items(states[150:])
+    assert [blossom.inserted_items for blossom in loaded.filters] == [100, 300, 600]
+    assert loaded.dump() == scalable.dump()
+    assert loaded.estimate_false_positive_rate() <= 0.001
+
+    # Version 1: number of items and size of each filter, without parameters nor capacities.
+    parts = [struct.pack("<4sBI", b"SPXS", 1, len(scalable.filters))]
+    for blossom in scalable.filters:
+        parts += [struct.pack("<QQ", blossom.inserted_items, len(blossom.serialized())), bytes(blossom.serialized())]
+    legacy = ScalableBlossom.from_serialized(b"".join(parts))
+    assert legacy.read_only and legacy.inserted_items == len(states)
+    assert legacy.is_hit_batch(states).all()
+    with pytest.raises(InvalidValueException):
+        legacy.add(np.int64(-1))
+
+
+def test_blossom_proof_cache(monkeypatch):
+    # Test: repeated verifications of the same proof skip decoding and false positive rate estimation.
+
+    blossom = Blossom(expected_items=100)
+    blossom.add_items(np.arange(100, dtype=np.int64))
+    proof = SolverProof(bloomFilter=blossom.dump(), countItems=blossom.inserted_items)
+
+    monkeypatch.setattr(Blossom, "proof_cache", LRUCache(max_entries=10))
+    loaded = Blossom.load(proof)
+    assert Blossom.load(SolverProof(bloomFilter=proof.bloomFilter, countItems=proof.countItems)) is loaded
+    assert Blossom.load(SolverProof(bloomFilter=proof.bloomFilter, countItems=99)) is not loaded
+
+    stats = Blossom.proof_cache.stats
+    assert (stats.hits, stats.misses, stats.entries) == (1, 2, 2)
+
+    # Shared instances are read-only, so that no caller can alter the proof seen by the others.
+    with pytest.raises(InvalidValueException):
+        loaded.add(np.int64(12345))
+    with pytest.raises(InvalidValueException):
+        loaded.add_batch(np.array([12345]))
+    with pytest.raises(InvalidValueException):
+        loaded.merge(blossom)
+    assert loaded.inserted_items == 100 and loaded.dump() == proof.bloomFilter
+
+    assert loaded.verify_false_positive_rate() is True
+    # The bit density is memoized as well, e.g. for the false positive rate that sizes the samples.
+    monkeypatch.setattr("warden_spex.spex.count_bits", None)
+    assert loaded.estimate_false_positive_rate() < 0.02
+    monkeypatch.setattr(Blossom, "bit_density", None)
+    assert loaded.verify_false_positive_rate() is True
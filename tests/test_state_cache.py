@@ -0,0 +1,44 @@
+from test_spex import PrimeSumTask, SolverInputPrimeSum
+
+from warden_spex.state_cache import StateCache
+
+
+def test_state_cache():
+    # Test: states are cached by task, input and index, and resumed from the nearest checkpoint.
+
+    calls = []
+
+    def compute_state(i):
+        calls.append(("compute", i))
+        return i * 10
+
+    def resume_state(j, state_j, i):
+        calls.append(("resume", j, i))
+        return state_j + (i - j) * 10
+
+    cache = StateCache(max_entries=3)
+    input_a, input_b = SolverInputPrimeSum(no_of_primes=1), SolverInputPrimeSum(no_of_primes=2)
+    assert cache.compute(PrimeSumTask, input_a, 5, compute_state, resume_state) == 50
+    assert cache.compute(PrimeSumTask, input_a, 5, compute_state, resume_state) == 50
+    assert cache.compute(PrimeSumTask, input_a, 8, compute_state, resume_state) == 80
+    assert cache.compute(PrimeSumTask, input_a, 2, compute_state, resume_state) == 20
+    assert cache.compute(PrimeSumTask, input_b, 8, compute_state, resume_state) == 80
+    assert calls == [("compute", 5), ("resume", 5, 8), ("compute", 2), ("compute", 8)]
+
+    # Least recently used states are evicted, and never used as checkpoints.
+    assert len(cache) == 3
+    assert cache.get(PrimeSumTask, input_a, 5) is None
+    assert cache.checkpoint(PrimeSumTask, input_a, 7) == (2, 20)
+    assert cache.checkpoint(PrimeSumTask, input_a, 2) is None
+
+
+def test_task_state_cache(monkeypatch):
+    # Test: tasks opting in share the recomputed states across requests.
+
+    assert PrimeSumTask.cached_state(None, 10, PrimeSumTask.ith_prime) == 29
+
+    monkeypatch.setattr(PrimeSumTask, "state_cache", StateCache())
+    primes = [PrimeSumTask.cached_state(None, i, PrimeSumTask.ith_prime, PrimeSumTask.resume_ith_prime) for i in (10, 100, 50, 100)]
+    assert primes == [29, 541, 229, 541]
+    assert PrimeSumTask.state_cache.stats.hits >= 1
+    assert PrimeSumTask.state_cache.checkpoint(PrimeSumTask, None, 60) == (50, 229)